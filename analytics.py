@@ -0,0 +1,234 @@
+import numpy as np
+from movie_catalog import MovieCatalog, NO_YEAR
+from storage.normalize import year_range
+
+# Percentiles reported by default
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+# Edges of the whole-number rating buckets; a 10 counts towards 9-10
+RATING_BINS = np.arange(11)
+
+
+class MovieColumns:
+    """The ratings and start years of a catalog as NumPy arrays.
+
+    Rows line up with ``titles``. Missing ratings and unknown years are
+    NaN; series years such as ``2017–2024`` use their start year.
+    """
+
+    def __init__(self, titles, ratings, years):
+        self.titles = titles
+        self.ratings = ratings
+        self.years = years
+
+    @classmethod
+    def from_movies(cls, movies):
+        """Build the columns from a dictionary of movies or a MovieCatalog.
+
+        A MovieCatalog's arrays are converted directly, without visiting
+        its records one by one.
+        """
+        if isinstance(movies, MovieCatalog):
+            titles, ratings, years, year_text = movies.columns()
+            # The catalog stores single precision ratings and rounds them when read
+            ratings = np.round(np.frombuffer(ratings, dtype=np.float32).astype(np.float64), 4)
+            years = np.frombuffer(years, dtype=np.uint16).astype(np.float64)
+            years[years == NO_YEAR] = np.nan
+            for row, text in year_text.items():
+                start = year_range(text)[0]
+                if start is not None:
+                    years[row] = start
+            return cls(list(titles), ratings, years)
+
+        titles = list(movies)
+        ratings = np.fromiter(
+            (np.nan if details.get('rating') is None else details['rating']
+             for details in movies.values()),
+            dtype=np.float64, count=len(titles)
+        )
+        years = np.fromiter(
+            (np.nan if start is None else start
+             for start, _ in (year_range(details.get('year')) for details in movies.values())),
+            dtype=np.float64, count=len(titles)
+        )
+        return cls(titles, ratings, years)
+
+    def __len__(self):
+        return len(self.titles)
+
+
+def _average_ranks(values):
+    """Return the rank of every value, giving tied values their average rank."""
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    ends = np.cumsum(counts)
+    return ((ends - counts + 1 + ends) / 2)[inverse]
+
+
+def _group_percentiles(groups, values, percents):
+    """Return percentiles of values within each group, interpolating linearly.
+
+    Every group is handled at once: the values are sorted by group and
+    value, and the positions of each percentile are computed from the
+    group offsets, as numpy.percentile does for a single group.
+
+    Returns:
+        tuple: The sorted group labels and a (groups, percents) array.
+    """
+    order = np.lexsort((values, groups))
+    groups, values = groups[order], values[order]
+    labels, starts, counts = np.unique(groups, return_index=True, return_counts=True)
+    positions = starts[:, None] + (counts[:, None] - 1) * np.asarray(percents) / 100
+    lower = np.floor(positions).astype(np.intp)
+    upper = np.minimum(lower + 1, (starts + counts - 1)[:, None])
+    fraction = positions - lower
+    return labels, values[lower] * (1 - fraction) + values[upper] * fraction
+
+
+class CatalogAnalytics:
+    """Vectorized statistics over a whole catalog, cached until the storage changes.
+
+    Works with any storage that has list_movies, or get_movies as
+    StorageJson does. The catalog is loaded into MovieColumns once and
+    every result is kept until the storage's version() changes. Storages
+    whose version() is None cannot tell, so they are reloaded every time.
+    """
+
+    def __init__(self, storage):
+        """Initialize the analytics.
+
+        Args:
+            storage: The storage to read the catalog from.
+        """
+        self._storage = storage
+        self._columns = None
+        self._version = None
+        self._results = {}
+
+    def columns(self):
+        """Return the catalog as MovieColumns, reloading it if the storage changed."""
+        version = self._storage.version() if hasattr(self._storage, 'version') else None
+        if self._columns is None or version is None or version != self._version:
+            if hasattr(self._storage, 'list_movies'):
+                movies = self._storage.list_movies()
+            else:
+                movies = self._storage.get_movies()
+            self._columns = MovieColumns.from_movies(movies)
+            self._version = version
+            self._results = {}
+        return self._columns
+
+    def _cached(self, key, compute):
+        """Return a result computed from the current columns, computing it once."""
+        columns = self.columns()
+        if key not in self._results:
+            self._results[key] = compute(columns)
+        return self._results[key]
+
+    def summary(self):
+        """Return count, average, median, standard deviation, best and worst, or None.
+
+        Best and worst are (title, rating) pairs.
+        """
+        def compute(columns):
+            rated = np.flatnonzero(~np.isnan(columns.ratings))
+            if not len(rated):
+                return None
+            ratings = columns.ratings[rated]
+            best, worst = rated[np.argmax(ratings)], rated[np.argmin(ratings)]
+            return {
+                'count': len(rated),
+                'average': float(ratings.mean()),
+                'median': float(np.median(ratings)),
+                'std': float(ratings.std()),
+                'best': (columns.titles[best], float(columns.ratings[best])),
+                'worst': (columns.titles[worst], float(columns.ratings[worst]))
+            }
+        return self._cached('summary', compute)
+
+    def by_decade(self):
+        """Return {decade: (count, average rating)} for rated movies with a known year."""
+        def compute(columns):
+            known = ~np.isnan(columns.ratings) & ~np.isnan(columns.years)
+            decades = (columns.years[known] // 10 * 10).astype(np.int64)
+            labels, inverse = np.unique(decades, return_inverse=True)
+            counts = np.bincount(inverse, minlength=len(labels))
+            totals = np.bincount(inverse, weights=columns.ratings[known], minlength=len(labels))
+            return {
+                int(decade): (int(count), float(total / count))
+                for decade, count, total in zip(labels, counts, totals)
+            }
+        return self._cached('by_decade', compute)
+
+    def distribution(self):
+        """Return {bucket: count} for whole-number rating buckets 0 to 9, including empty ones.
+
+        Bucket ``n`` holds ratings from n up to n + 1; a 10 counts towards 9.
+        """
+        def compute(columns):
+            ratings = columns.ratings[~np.isnan(columns.ratings)]
+            counts, _ = np.histogram(np.clip(ratings, 0, 10), bins=RATING_BINS)
+            return {int(bucket): int(count) for bucket, count in zip(RATING_BINS, counts)}
+        return self._cached('distribution', compute)
+
+    def correlation(self):
+        """Return how ratings relate to release years, or None with fewer than two movies.
+
+        Returns:
+            dict: count of movies with both, Pearson and Spearman (rank)
+            correlation coefficients, and the slope of the least-squares
+            line as rating change per decade. Coefficients are None when
+            all years or all ratings are equal.
+        """
+        def compute(columns):
+            known = ~np.isnan(columns.ratings) & ~np.isnan(columns.years)
+            years, ratings = columns.years[known], columns.ratings[known]
+            if len(years) < 2:
+                return None
+            if np.ptp(years) == 0 or np.ptp(ratings) == 0:
+                pearson = spearman = None
+                slope = 0.0 if np.ptp(years) else None
+            else:
+                pearson = float(np.corrcoef(years, ratings)[0, 1])
+                spearman = float(np.corrcoef(_average_ranks(years), _average_ranks(ratings))[0, 1])
+                slope = float(np.polyfit(years, ratings, 1)[0] * 10)
+            return {
+                'count': len(years),
+                'pearson': pearson,
+                'spearman': spearman,
+                'slope_per_decade': slope
+            }
+        return self._cached('correlation', compute)
+
+    def percentiles(self, percents=PERCENTILES):
+        """Return rating percentiles for the whole catalog and for each decade.
+
+        Args:
+            percents (tuple): The percentiles to compute, from 0 to 100.
+
+        Returns:
+            dict: {'all': {percent: rating}, decade: {percent: rating}, ...};
+            empty if no movie is rated.
+        """
+        percents = tuple(percents)
+
+        def compute(columns):
+            rated = ~np.isnan(columns.ratings)
+            if not rated.any():
+                return {}
+            table = {'all': dict(zip(percents, np.percentile(columns.ratings[rated], percents).tolist()))}
+            known = rated & ~np.isnan(columns.years)
+            decades = (columns.years[known] // 10 * 10).astype(np.int64)
+            labels, values = _group_percentiles(decades, columns.ratings[known], percents)
+            for decade, row in zip(labels, values):
+                table[int(decade)] = dict(zip(percents, row.tolist()))
+            return table
+        return self._cached(('percentiles', percents), compute)
+
+    def report(self):
+        """Return every statistic as a JSON-serializable dictionary."""
+        return {
+            'summary': self.summary(),
+            'by_decade': self.by_decade(),
+            'distribution': self.distribution(),
+            'correlation': self.correlation(),
+            'percentiles': self.percentiles()
+        }
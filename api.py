@@ -0,0 +1,316 @@
+import base64
+import binascii
+import bisect
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import Flask, Response, jsonify, request
+from rating_stats import RatingStatistics
+from search_index import SearchIndex
+from storage.normalize import year_range
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Responses smaller than this are not worth compressing
+GZIP_MIN_SIZE = 1024
+# Rendered responses kept per snapshot
+RESPONSE_CACHE_SIZE = 1024
+
+
+def _title_key(title, details):
+    return title.casefold(), title
+
+
+def _rating_key(title, details):
+    return -(details.get('rating') or 0), title.casefold(), title
+
+
+def _year_key(title, details):
+    return -(year_range(details.get('year'))[0] or 0), title.casefold(), title
+
+
+# Sort orders of the API, mapped to their sort keys. Every key ends with the
+# title, so it identifies one movie and can serve as a pagination cursor.
+SORT_KEYS = {
+    'title': _title_key,
+    'year': _year_key,
+    'rating': _rating_key
+}
+
+# Field types of each order's sort key, checked when a cursor is decoded
+KEY_TYPES = {
+    'title': (str, str),
+    'year': ((int, float), str, str),
+    'rating': ((int, float), str, str)
+}
+
+
+class ApiError(Exception):
+    """A client error reported as a JSON response."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def encode_cursor(key):
+    """Turn a sort key into an opaque, URL-safe cursor."""
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, order):
+    """Turn a cursor back into a sort key of the given order.
+
+    Raises:
+        ApiError: If the cursor is malformed or was issued for another order.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        key = tuple(json.loads(base64.urlsafe_b64decode(padded)))
+    except (binascii.Error, ValueError, TypeError):
+        raise ApiError("Invalid cursor.")
+    types = KEY_TYPES[order]
+    if len(key) != len(types) or not all(
+            isinstance(field, field_type) and not isinstance(field, bool)
+            for field, field_type in zip(key, types)):
+        raise ApiError("Invalid cursor.")
+    return key
+
+
+class _Snapshot:
+    """The movies of one storage version with everything derived from them.
+
+    Sorted orders are built up front, the search index and the statistics
+    on first use. Rendered responses are cached, least recently used
+    first out, until the snapshot is replaced. Requests are served from
+    several threads, so every access to the cache holds a lock.
+    """
+
+    def __init__(self, movies, version):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.movies = {title: dict(details) for title, details in movies}
+        self.orders = {}
+        for order, sort_key in SORT_KEYS.items():
+            keyed = sorted((sort_key(title, details), title) for title, details in self.movies.items())
+            self.orders[order] = ([key for key, _ in keyed], [title for _, title in keyed])
+        self.responses = OrderedDict()
+        self._search_index = None
+        self._statistics = None
+        self._lock = threading.Lock()
+        self._responses_lock = threading.Lock()
+
+    def cached_response(self, cache_key):
+        """Return a cached response entry and mark it as recently used, or None."""
+        with self._responses_lock:
+            entry = self.responses.get(cache_key)
+            if entry is not None:
+                self.responses.move_to_end(cache_key)
+            return entry
+
+    def cache_response(self, cache_key, entry):
+        """Cache a response entry, evicting the least recently used one if full."""
+        with self._responses_lock:
+            self.responses[cache_key] = entry
+            self.responses.move_to_end(cache_key)
+            if len(self.responses) > RESPONSE_CACHE_SIZE:
+                self.responses.popitem(last=False)
+
+    @property
+    def search_index(self):
+        with self._lock:
+            if self._search_index is None:
+                self._search_index = SearchIndex()
+                self._search_index.rebuild(self.movies)
+            return self._search_index
+
+    @property
+    def statistics(self):
+        with self._lock:
+            if self._statistics is None:
+                self._statistics = RatingStatistics()
+                self._statistics.rebuild(self.movies)
+            return self._statistics
+
+
+class MovieApiCache:
+    """Process-level cache of a storage's movies for the API.
+
+    Every request compares the storage's version() with the cached one and
+    reloads the movies only when it changed. Backends that cannot report a
+    version are reloaded at most every ``ttl`` seconds.
+    """
+
+    def __init__(self, storage, ttl=5.0):
+        self.storage = storage
+        self.ttl = ttl
+        self.loads = 0
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, snapshot, version):
+        if version is None:
+            return time.monotonic() - snapshot.loaded_at < self.ttl
+        return version == snapshot.version
+
+    def snapshot(self):
+        """Return the current snapshot, reloading the storage if it changed."""
+        with self._lock:
+            version = self.storage.version()
+            snapshot = self._snapshot
+            if snapshot is None or not self._is_fresh(snapshot, version):
+                snapshot = _Snapshot(self.storage.iter_movies(), version)
+                self._snapshot = snapshot
+                self.loads += 1
+            return snapshot
+
+
+def _int_arg(name, default, minimum, maximum):
+    """Read an integer query parameter, raising ApiError if it is invalid."""
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ApiError(f"'{name}' must be an integer.")
+    if not minimum <= value <= maximum:
+        raise ApiError(f"'{name}' must be between {minimum} and {maximum}.")
+    return value
+
+
+def _movie_json(title, details):
+    return {'title': title, **details}
+
+
+def _page(snapshot, order):
+    """Return one page of movies in the given order, starting after the cursor."""
+    limit = _int_arg('limit', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    keys, titles = snapshot.orders[order]
+    cursor = request.args.get('cursor')
+    start = bisect.bisect_right(keys, decode_cursor(cursor, order)) if cursor else 0
+    end = min(start + limit, len(titles))
+    return {
+        'movies': [_movie_json(title, snapshot.movies[title]) for title in titles[start:end]],
+        'total': len(titles),
+        'next_cursor': encode_cursor(keys[end - 1]) if end < len(titles) else None
+    }
+
+
+def _respond(snapshot, render):
+    """Return a cached JSON response with an ETag, gzip-compressed if accepted.
+
+    Args:
+        snapshot: The snapshot the response is rendered from.
+        render: Called without arguments to build the payload on a cache miss.
+    """
+    cache_key = request.full_path
+    entry = snapshot.cached_response(cache_key)
+    if entry is None:
+        body = json.dumps(render(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        etag = hashlib.sha1(body).hexdigest()
+        compressed = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_SIZE else None
+        entry = (etag, body, compressed)
+        snapshot.cache_response(cache_key, entry)
+    etag, body, compressed = entry
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    elif compressed is not None and 'gzip' in request.accept_encodings:
+        response = Response(compressed, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def create_app(storage, ttl=5.0):
+    """Create a read-only JSON API over a storage.
+
+    Endpoints:
+        /api/movies                  All movies by title, paginated.
+        /api/movies/sorted/<order>   All movies by title, year or rating, paginated.
+        /api/movies/<title>          A single movie.
+        /api/search?q=...            Movies matching a search query.
+        /api/stats                   Rating statistics.
+
+    Lists take ``limit`` and the ``next_cursor`` of the previous page as
+    ``cursor``.
+
+    Args:
+        storage: Any storage implementing IStorage.
+        ttl (float): Reload interval for storages without a version().
+    """
+    app = Flask(__name__)
+    cache = MovieApiCache(storage, ttl)
+    app.config['MOVIE_CACHE'] = cache
+
+    @app.errorhandler(ApiError)
+    def api_error(error):
+        return jsonify({'error': str(error)}), error.status
+
+    @app.get('/api/movies')
+    def list_movies():
+        snapshot = cache.snapshot()
+        return _respond(snapshot, lambda: _page(snapshot, 'title'))
+
+    @app.get('/api/movies/sorted/<order>')
+    def sorted_movies(order):
+        if order not in SORT_KEYS:
+            raise ApiError(f"Unknown sort order '{order}'.", 404)
+        snapshot = cache.snapshot()
+        return _respond(snapshot, lambda: _page(snapshot, order))
+
+    @app.get('/api/movies/<path:title>')
+    def get_movie(title):
+        snapshot = cache.snapshot()
+        if title not in snapshot.movies:
+            raise ApiError(f"Movie '{title}' not found.", 404)
+        return _respond(snapshot, lambda: _movie_json(title, snapshot.movies[title]))
+
+    @app.get('/api/search')
+    def search_movies():
+        query = request.args.get('q', '').strip()
+        if not query:
+            raise ApiError("'q' is required.")
+        limit = _int_arg('limit', 10, 1, MAX_PAGE_SIZE)
+        snapshot = cache.snapshot()
+        return _respond(snapshot, lambda: {
+            'movies': [_movie_json(title, snapshot.movies[title])
+                       for title in snapshot.search_index.search(query, limit)]
+        })
+
+    @app.get('/api/stats')
+    def stats():
+        snapshot = cache.snapshot()
+
+        def render():
+            statistics = snapshot.statistics
+            return {
+                'total': len(snapshot.movies),
+                'summary': statistics.summary(),
+                'histogram': statistics.histogram(),
+                'by_year': statistics.by_year()
+            }
+
+        return _respond(snapshot, render)
+
+    return app
+
+
+if __name__ == "__main__":
+    # python api.py
+    from storage.storage_csv_cached import StorageCsvCached
+
+    create_app(StorageCsvCached(os.getenv('API_STORAGE_FILE', 'data/storage.csv'))).run(
+        host=os.getenv('API_HOST', '127.0.0.1'),
+        port=int(os.getenv('API_PORT', '5000')),
+        threaded=True
+    )
@@ -0,0 +1,52 @@
+"""Measure bulk OMDb import throughput against the local stub server.
+
+    python -m benchmarks.bench_import --titles 2000 --workers 16 --latency 0.02
+"""
+import argparse
+import os
+import tempfile
+import time
+from omdb_client import OmdbClient, movie_from_omdb
+from storage.storage_csv import StorageCsv
+from benchmarks.omdb_stub import start_stub_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--rate-limit', type=float, default=0.0,
+                        help="requests per second, 0 for no limit")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(latency=args.latency)
+    titles = [f"Movie {number}" for number in range(args.titles)]
+    client = OmdbClient('stub', api_url=url, max_workers=args.workers,
+                        rate_limit=args.rate_limit)
+
+    with tempfile.TemporaryDirectory() as directory:
+        storage = StorageCsv(os.path.join(directory, 'storage.csv'))
+
+        start = time.perf_counter()
+        results = client.fetch_many(titles)
+        fetched = time.perf_counter()
+
+        movies = {}
+        for _, data, _ in results:
+            if data:
+                title, year, rating, poster = movie_from_omdb(data)
+                movies[title] = {'rating': rating, 'year': year, 'poster': poster}
+        storage.add_movies(movies)
+        written = time.perf_counter()
+
+    client.close()
+    server.shutdown()
+
+    print(f"fetched {len(titles)} titles in {fetched - start:.2f}s "
+          f"({len(titles) / (fetched - start):.0f} titles/s)")
+    print(f"wrote {len(movies)} movies in {written - fetched:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
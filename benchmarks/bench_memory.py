@@ -0,0 +1,47 @@
+"""Compare the memory footprint of dict-of-dicts movies with MovieCatalog.
+
+    python -m benchmarks.bench_memory --rows 1000000
+"""
+import argparse
+import gc
+import random
+import tracemalloc
+from movie_catalog import MovieCatalog
+
+
+def synthetic_rows(count, seed=0):
+    """Yield (title, details) pairs shaped like StorageCsv rows."""
+    rng = random.Random(seed)
+    posters = [f"https://m.media-amazon.com/images/M/{number:08d}._V1_SX300.jpg"
+               for number in range(1000)]
+    for number in range(count):
+        yield f"Movie {number}", {
+            'rating': round(rng.uniform(1, 10), 1),
+            'year': rng.randint(1920, 2024) if number % 50 else f"{2000 + number % 20}–2024",
+            'poster': rng.choice(posters)
+        }
+
+
+def measure(build, count):
+    """Return the bytes allocated by build() for count rows."""
+    gc.collect()
+    tracemalloc.start()
+    movies = build(synthetic_rows(count))
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del movies
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    for name, build in (('dict of dicts', dict), ('MovieCatalog', MovieCatalog.from_rows)):
+        size = measure(build, args.rows)
+        print(f"{name:>14}: {size / 2 ** 20:8.1f} MiB total, {size / args.rows:6.1f} bytes/row")
+
+
+if __name__ == "__main__":
+    main()
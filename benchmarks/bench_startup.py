@@ -0,0 +1,104 @@
+"""Measure the cold-start import time of main.py with ``python -X importtime``.
+
+    python -m benchmarks.bench_startup --runs 20
+    python -m benchmarks.bench_startup --baseline HEAD~1
+
+Each run imports main in a fresh interpreter. The median cumulative
+import time of main and the wall time of the whole interpreter start are
+reported, along with the slowest modules main pulls in. With --baseline
+the same is measured on a git revision, extracted to a temporary
+directory, for comparison.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr, root='main'):
+    """Return {module: (self µs, cumulative µs)} for root and what it imported.
+
+    -X importtime lists a module's imports before the module itself, so
+    root's imports are the lines between the previous top-level module
+    and root.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_time), int(cumulative))
+        if name.startswith('  '):
+            continue
+        if name.strip() == root:
+            return modules
+        modules = {}
+    return modules
+
+
+def measure(directory, runs):
+    """Import main ``runs`` times in fresh interpreters started in directory.
+
+    Returns:
+        tuple: Median import time of main and median wall time in seconds,
+        and the modules of the last run.
+    """
+    # Start from compiled bytecode, as an installed copy would
+    subprocess.run([sys.executable, '-m', 'compileall', '-q', '.'], cwd=directory,
+                   env=dict(os.environ, PYTHONDONTWRITEBYTECODE=''), check=True)
+    imports, walls = [], []
+    modules = {}
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                                cwd=directory, capture_output=True, text=True, check=True)
+        walls.append(time.perf_counter() - started)
+        modules = parse_importtime(result.stderr)
+        imports.append(modules['main'][1] / 1e6)
+    return statistics.median(imports), statistics.median(walls), modules
+
+
+def extract_revision(revision, directory):
+    """Extract the tree of a git revision into directory."""
+    archive = subprocess.run(['git', 'archive', revision], cwd=ROOT, capture_output=True, check=True)
+    subprocess.run(['tar', '-x', '-C', directory], input=archive.stdout, check=True)
+
+
+def report(label, import_time, wall_time, modules, top):
+    """Print the timings and the modules that take longest to import themselves."""
+    print(f"{label}: import main {import_time * 1000:.1f} ms, interpreter start to exit "
+          f"{wall_time * 1000:.1f} ms")
+    loaded = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)
+    for name, (self_time, cumulative) in loaded[:top]:
+        print(f"    {name:<40} {self_time / 1000:7.1f} ms self {cumulative / 1000:7.1f} ms total")
+    heavy = [name for name in ('requests', 'urllib3', 'dotenv', 'PIL', 'multiprocessing')
+             if name in modules]
+    print(f"    network and optional modules loaded: {', '.join(heavy) or 'none'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10, help="Slowest modules to list")
+    parser.add_argument('--baseline', help="Git revision to compare with")
+    args = parser.parse_args()
+
+    current = measure(ROOT, args.runs)
+    report("working tree", *current, args.top)
+
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as directory:
+            extract_revision(args.baseline, directory)
+            baseline = measure(directory, args.runs)
+        report(args.baseline, *baseline, args.top)
+        print(f"import main is {baseline[0] / current[0]:.1f}x faster, "
+              f"start to exit {baseline[1] / current[1]:.1f}x faster than {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""Time storage, search, statistics, sorting and site generation on synthetic catalogs.
+
+    python -m benchmarks.bench_suite --sizes 1000,100000,1000000 --output bench.json
+    python -m benchmarks.bench_suite --sizes 1000,100000 --compare bench.json
+
+Catalogs are written in the data/storage.csv and data/data.json formats
+to a temporary directory, or to --data-dir to reuse them between runs.
+Every benchmark runs --repeat times and the median and minimum are
+reported. The results are written as JSON together with the commit and
+Python version, and --compare prints the change against an earlier run.
+"""
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import movies as movie_helpers
+from analytics import CatalogAnalytics, MovieColumns
+from benchmarks.bench_memory import synthetic_rows
+from rating_stats import RatingStatistics
+from search_index import SearchIndex
+from sort_index import SortIndex
+from storage.storage_csv import StorageCsv
+from storage.storage_json import StorageJson
+from web_generator import WebsiteBuilder, TEMPLATE_FILE, write_website
+
+# Relative change reported as a regression or an improvement by --compare
+THRESHOLD = 0.10
+
+
+@contextlib.contextmanager
+def quiet(answer=''):
+    """Silence print() and answer every input() prompt with ``answer``."""
+    original_input = builtins.input
+    builtins.input = lambda prompt='': answer
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        builtins.input = original_input
+
+
+def write_catalogs(directory, size):
+    """Write storage.csv and data.json with ``size`` synthetic movies, unless they exist."""
+    csv_path = os.path.join(directory, f'storage-{size}.csv')
+    json_path = os.path.join(directory, f'data-{size}.json')
+    if not (os.path.exists(csv_path) and os.path.exists(json_path)):
+        movies = dict(synthetic_rows(size))
+        with quiet():
+            StorageCsv(csv_path).save_movies(movies)
+            StorageJson(json_path).save_movies(movies)
+    return csv_path, json_path
+
+
+class Suite:
+    """Collects timings as result dictionaries."""
+
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = []
+
+    def time(self, name, size, func, setup=None):
+        """Time func() ``repeat`` times; setup(), if given, runs untimed before each call."""
+        timings = []
+        for number in range(self.repeat):
+            argument = setup(number) if setup else None
+            with quiet('Movie 12'):
+                started = time.perf_counter()
+                func() if setup is None else func(argument)
+                timings.append(time.perf_counter() - started)
+        result = {
+            'name': name,
+            'size': size,
+            'median': statistics.median(timings),
+            'min': min(timings),
+            'repeat': self.repeat
+        }
+        self.results.append(result)
+        print(f"{name:<36} {size:>9} {result['median'] * 1000:12.3f} ms", file=sys.stderr)
+
+
+def run_size(suite, directory, size):
+    """Run every benchmark on a catalog of ``size`` movies."""
+    csv_path, json_path = write_catalogs(directory, size)
+    storage = StorageCsv(csv_path)
+
+    suite.time('csv.list_movies', size, storage.list_movies)
+    suite.time('csv.add_movie', size,
+               lambda number: storage.add_movie(f"Bench Movie {number}", 2024, 7.5, ''),
+               setup=lambda number: number)
+    suite.time('csv.update_movie', size,
+               lambda title: storage.update_movie(title, 9.0),
+               setup=lambda number: f"Movie {number}")
+    suite.time('csv.delete_movie', size,
+               lambda title: storage.delete_movie(title),
+               setup=lambda number: f"Bench Movie {number}")
+
+    json_storage = StorageJson(json_path)
+    suite.time('json.get_movies', size, json_storage.get_movies)
+    json_movies = json_storage.get_movies()
+    suite.time('json.save_movies', size, lambda: json_storage.save_movies(json_movies))
+
+    movies = storage.list_movies()
+    search_index = SearchIndex()
+    stats = RatingStatistics()
+    sort_index = SortIndex()
+    suite.time('search_index.rebuild', size, lambda: search_index.rebuild(movies))
+    suite.time('rating_statistics.rebuild', size, lambda: stats.rebuild(movies))
+    suite.time('sort_index.rebuild', size, lambda: sort_index.rebuild(movies))
+
+    suite.time('search_movie', size, lambda: movie_helpers.search_movie(movies))
+    suite.time('search_movie.indexed', size, lambda: movie_helpers.search_movie(movies, search_index))
+    suite.time('rating_statistics', size, lambda: movie_helpers.rating_statistics(movies))
+    suite.time('rating_statistics.indexed', size,
+               lambda: movie_helpers.rating_statistics(movies, stats))
+    suite.time('sort_movie_by_year', size, lambda: movie_helpers.sort_movie_by_year(movies))
+    suite.time('sort_movie_by_year.indexed', size,
+               lambda: movie_helpers.sort_movie_by_year(movies, sort_index))
+    suite.time('sort_movie_by_rating', size, lambda: movie_helpers.sort_movie_by_rating(movies))
+    suite.time('sort_movie_by_rating.indexed', size,
+               lambda: movie_helpers.sort_movie_by_rating(movies, sort_index))
+    suite.time('top_movies_by_rating', size, lambda: movie_helpers.top_movies_by_rating(movies))
+    suite.time('analytics.columns', size, lambda: MovieColumns.from_movies(movies))
+    suite.time('analytics.report', size, lambda analytics: analytics.report(),
+               setup=lambda number: CatalogAnalytics(storage))
+
+    # What MovieApp.generate_website does, without the poster downloads
+    site = os.path.join(directory, f'site-{size}')
+    os.makedirs(site, exist_ok=True)
+    output_file = os.path.join(site, 'movie_list.html')
+    template_file = os.path.abspath(TEMPLATE_FILE)
+    suite.time('write_website', size,
+               lambda: write_website(movies, output_file, "Bench", template_file))
+    suite.time('generate_website.cold', size,
+               lambda builder: builder.build(movies),
+               setup=lambda number: WebsiteBuilder(output_file, "Bench", template_file))
+    builder = WebsiteBuilder(output_file, "Bench", template_file)
+    builder.build(movies)
+    suite.time('generate_website.unchanged', size, lambda: builder.build(movies))
+
+
+def git_commit():
+    """Return the current commit hash, or None outside a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, results):
+    """Print the change of every result against the matching baseline result."""
+    previous = {(result['name'], result['size']): result['median'] for result in baseline['results']}
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'}:", file=sys.stderr)
+    for result in results:
+        before = previous.get((result['name'], result['size']))
+        if not before:
+            continue
+        change = result['median'] / before - 1
+        verdict = 'slower' if change > THRESHOLD else 'faster' if change < -THRESHOLD else ''
+        print(f"{result['name']:<36} {result['size']:>9} {change:+8.1%} {verdict}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,100000,1000000',
+                        help="Comma-separated catalog sizes")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--data-dir', help="Keep the generated catalogs here")
+    parser.add_argument('--output', help="Write the JSON results to this file instead of stdout")
+    parser.add_argument('--compare', type=argparse.FileType('r'),
+                        help="JSON results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    suite = Suite(args.repeat)
+    with contextlib.ExitStack() as stack:
+        directory = args.data_dir or stack.enter_context(tempfile.TemporaryDirectory())
+        os.makedirs(directory, exist_ok=True)
+        for size in (int(size) for size in args.sizes.split(',')):
+            run_size(suite, directory, size)
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'results': suite.results
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        compare(json.load(args.compare), suite.results)
+
+
+if __name__ == "__main__":
+    main()
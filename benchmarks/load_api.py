@@ -0,0 +1,109 @@
+"""Load-test the read-only JSON API and report requests per second and latency.
+
+    python -m benchmarks.load_api --rows 10000 --clients 8 --seconds 10
+    python -m benchmarks.load_api --url http://127.0.0.1:5000 --conditional
+
+Without --url a server is started in this process over a synthetic
+catalog. With --conditional clients send If-None-Match with the ETag of
+their previous response, as browsers and caching proxies do.
+"""
+import argparse
+import contextlib
+import io
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+import requests
+from werkzeug.serving import make_server
+from api import create_app
+from benchmarks.bench_memory import synthetic_rows
+from storage.storage_csv_cached import StorageCsvCached
+
+PATHS = [
+    '/api/movies?limit=50',
+    '/api/movies/sorted/rating?limit=50',
+    '/api/movies/sorted/year?limit=100',
+    '/api/search?q=movie+12',
+    '/api/stats',
+]
+
+
+@contextlib.contextmanager
+def local_server(rows):
+    """Serve a synthetic catalog of ``rows`` movies and yield its base URL."""
+    with tempfile.TemporaryDirectory() as directory:
+        storage = StorageCsvCached(os.path.join(directory, 'storage.csv'))
+        with contextlib.redirect_stdout(io.StringIO()):
+            storage.save_movies(dict(synthetic_rows(rows)))
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)  # No per-request log lines
+        server = make_server('127.0.0.1', 0, create_app(storage), threaded=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield f"http://127.0.0.1:{server.server_port}"
+        finally:
+            server.shutdown()
+
+
+def client(base_url, deadline, conditional, latencies, statuses):
+    """Request PATHS round robin until the deadline, recording each latency."""
+    session = requests.Session()
+    session.headers['Accept-Encoding'] = 'gzip'
+    etags = {}
+    number = 0
+    while time.perf_counter() < deadline:
+        path = PATHS[number % len(PATHS)]
+        number += 1
+        headers = {'If-None-Match': etags[path]} if conditional and path in etags else {}
+        started = time.perf_counter()
+        response = session.get(base_url + path, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        statuses.append(response.status_code)
+        if 'ETag' in response.headers:
+            etags[path] = response.headers['ETag']
+
+
+def run(base_url, clients, seconds, conditional):
+    """Run the clients against base_url and print the results."""
+    latencies, statuses = [], []
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=client, args=(base_url, deadline, conditional, latencies, statuses))
+               for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    not_modified = statuses.count(304)
+    errors = sum(1 for status in statuses if status >= 400)
+    print(f"{len(latencies)} requests in {elapsed:.1f}s from {clients} clients: "
+          f"{len(latencies) / elapsed:.0f} req/s, p50 {p50 * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms, "
+          f"{not_modified} not modified, {errors} errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="Base URL of a running server")
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--conditional', action='store_true')
+    args = parser.parse_args()
+
+    if args.url:
+        run(args.url.rstrip('/'), args.clients, args.seconds, args.conditional)
+        return
+    with local_server(args.rows) as base_url:
+        run(base_url, args.clients, args.seconds, args.conditional)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Local stand-in for the OMDb API, used to benchmark imports offline.
+
+It also serves the poster images referenced by its responses under
+``/posters/``, so the poster pipeline can be exercised without network.
+
+Run it directly and point the app at it with
+``OMDB_API_URL=http://127.0.0.1:8765/``:
+
+    python -m benchmarks.omdb_stub --port 8765 --latency 0.05
+"""
+import argparse
+import hashlib
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+def fake_movie(title, base_url="https://example.com/"):
+    """Return a deterministic OMDb-style response for a title."""
+    if title.lower().startswith('missing'):
+        return {'Response': 'False', 'Error': 'Movie not found!'}
+    digest = int(hashlib.md5(title.encode('utf-8')).hexdigest(), 16)
+    return {
+        'Title': title,
+        'Year': str(1950 + digest % 75),
+        'imdbRating': f"{1 + digest % 90 / 10:.1f}",
+        'imdbID': f"tt{digest % 10_000_000:07d}",
+        'Poster': f"{base_url}posters/{digest % 100000}.jpg",
+        'Plot': f"A movie called {title}.",
+        'Response': 'True'
+    }
+
+
+def fake_poster(name):
+    """Return deterministic image bytes for a poster name."""
+    digest = hashlib.md5(name.encode('utf-8')).digest()
+    if Image is None:
+        return b'FAKEPOSTER' + digest
+    image = Image.new('RGB', (300, 450), tuple(digest[:3]))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+class OmdbStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency = 0.0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if self.latency:
+            time.sleep(self.latency)
+        if url.path.startswith('/posters/'):
+            body = fake_poster(url.path)
+            content_type = 'image/jpeg'
+        else:
+            query = parse_qs(url.query)
+            if 'i' in query:
+                title = query['i'][0]
+            else:
+                title = query.get('t', [''])[0]
+            base_url = f"http://{self.headers.get('Host', '127.0.0.1')}/"
+            body = json.dumps(fake_movie(title, base_url)).encode('utf-8')
+            content_type = 'application/json'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port=0, latency=0.0):
+    """Start the stub server in a background thread.
+
+    Returns:
+        tuple: The server and its base URL.
+    """
+    handler = type('Handler', (OmdbStubHandler,), {'latency': latency})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_port}/"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="seconds to wait before each response")
+    args = parser.parse_args()
+
+    handler = type('Handler', (OmdbStubHandler,), {'latency': args.latency})
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), handler)
+    print(f"OMDb stub listening on http://127.0.0.1:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Hammer one CSV file from several processes and check that nothing is lost.
+
+    python -m benchmarks.stress_storage --processes 4 --contended 2 --operations 200
+
+Each worker adds its own movies, updates their ratings and deletes every
+third one, through a fresh storage object per worker. At the end every
+surviving movie must be present with its final rating and the file must
+parse as CSV.
+
+Alongside them, contended workers share a few movies and raise their
+ratings by one with read-modify-write cycles through save_movies and
+expected_version, retrying on conflicts; every third cycle deletes a movie
+and adds it back with the raised rating. Each shared movie's final rating
+must equal the number of successful cycles on it, so no update was lost.
+"""
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+from storage.locking import StorageConflictError
+from storage.storage_csv import StorageCsv
+from storage.storage_csv_cached import StorageCsvCached
+from storage.storage_csv_log import StorageCsvLog
+
+STORAGES = {
+    'csv': StorageCsv,
+    'cached': StorageCsvCached,
+    'log': lambda file_path: StorageCsvLog(file_path, compact_threshold=50),
+}
+
+# Number of movies the contended workers compete for
+SHARED_MOVIES = 3
+
+
+def shared_title(number):
+    """Return the title of a movie shared by the contended workers."""
+    return f"Shared Movie {number}"
+
+
+def worker(kind, file_path, worker_id, operations):
+    """Add, update and delete this worker's movies; return the expected survivors."""
+    storage = STORAGES[kind](file_path)
+    expected = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for number in range(operations):
+            title = f"Worker {worker_id} Movie {number}"
+            storage.add_movie(title, 2000 + number % 25, 5.0, '')
+            storage.update_movie(title, float(number % 10))
+            if number % 3 == 0:
+                storage.delete_movie(title)
+            else:
+                expected[title] = float(number % 10)
+    return expected
+
+
+def save_versioned(storage, change):
+    """Apply change to a fresh copy of the movies and save it, retrying on conflicts.
+
+    Args:
+        storage: The storage to change.
+        change: Called with the movies; returns False to skip the save.
+
+    Returns:
+        tuple: (True if saved, number of conflicts retried).
+    """
+    conflicts = 0
+    while True:
+        with storage.lock.hold():
+            version = storage.version()
+            movies = dict(storage.list_movies())
+        if change(movies) is False:
+            return False, conflicts
+        try:
+            storage.save_movies(movies, expected_version=version)
+        except StorageConflictError:
+            conflicts += 1
+            continue
+        return True, conflicts
+
+
+def contended_worker(kind, file_path, worker_id, operations):
+    """Raise the shared movies' ratings by one per cycle.
+
+    Returns:
+        tuple: (successful cycles per shared title, number of conflicts).
+    """
+    storage = STORAGES[kind](file_path)
+    cycles = {shared_title(number): 0 for number in range(SHARED_MOVIES)}
+    conflicts = 0
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for number in range(operations):
+            title = shared_title((worker_id + number) % SHARED_MOVIES)
+            deleted = {}
+
+            def raise_rating(movies):
+                if title not in movies:
+                    return False  # Another worker is deleting and re-adding it
+                movies[title] = dict(movies[title], rating=movies[title]['rating'] + 1)
+
+            def delete(movies):
+                if title not in movies:
+                    return False
+                deleted.update(movies.pop(title))
+
+            def add_back(movies):
+                # Nobody else touches a missing title, so this only retries on other writes
+                movies[title] = dict(deleted, rating=deleted['rating'] + 1)
+
+            if number % 3 == 0:
+                saved, retried = save_versioned(storage, delete)
+                conflicts += retried
+                if saved:
+                    _, retried = save_versioned(storage, add_back)
+                    conflicts += retried
+            else:
+                saved, retried = save_versioned(storage, raise_rating)
+                conflicts += retried
+            if saved:
+                cycles[title] += 1
+    return cycles, conflicts
+
+
+def run(kind, processes, operations, contended):
+    """Run the workers against one temporary file and verify the result."""
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, 'storage.csv')
+        shared = {shared_title(number): {'rating': 0.0, 'year': 2000, 'poster': ''}
+                  for number in range(SHARED_MOVIES)}
+        with contextlib.redirect_stdout(io.StringIO()):
+            StorageCsv(file_path).save_movies(shared)
+
+        started = time.perf_counter()
+        with multiprocessing.Pool(processes + contended) as pool:
+            pending = pool.starmap_async(contended_worker, [(kind, file_path, worker_id, operations)
+                                                            for worker_id in range(contended)])
+            results = pool.starmap(worker, [(kind, file_path, worker_id, operations)
+                                            for worker_id in range(processes)])
+            contended_results = pending.get()
+        elapsed = time.perf_counter() - started
+
+        expected = dict.fromkeys(shared, 0.0)
+        for result in results:
+            expected.update(result)
+        conflicts = 0
+        for cycles, retried in contended_results:
+            for title, count in cycles.items():
+                expected[title] += count
+            conflicts += retried
+        with contextlib.redirect_stdout(io.StringIO()):
+            stored = STORAGES[kind](file_path).list_movies()
+        actual = {title: details['rating'] for title, details in stored.items()}
+
+    missing = expected.keys() - actual.keys()
+    unexpected = actual.keys() - expected.keys()
+    wrong = [title for title in expected.keys() & actual.keys() if expected[title] != actual[title]]
+    ok = not (missing or unexpected or wrong)
+    print(f"{kind:>6}: {processes} + {contended} x {operations} operations in {elapsed:6.2f}s, "
+          f"{len(actual)} movies, {conflicts} conflicts retried, {len(missing)} missing, "
+          f"{len(unexpected)} unexpected, {len(wrong)} wrong ratings -> {'OK' if ok else 'FAILED'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--operations', type=int, default=200)
+    parser.add_argument('--contended', type=int, default=2,
+                        help="workers that update and delete the shared movies")
+    parser.add_argument('--storage', choices=sorted(STORAGES), action='append')
+    args = parser.parse_args()
+
+    results = [run(kind, args.processes, args.operations, args.contended)
+               for kind in args.storage or sorted(STORAGES)]
+    raise SystemExit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""Opt-in timers and counters for MovieApp, its storage and the OMDb client.
+
+Enabled with ``python main.py --metrics FILE`` or ``MOVIE_METRICS=FILE``,
+which writes a JSON snapshot on exit (``-`` prints it to stderr), and
+``--profile FILE`` or ``MOVIE_PROFILE=FILE``, which saves a cProfile
+report readable with pstats. Instrumentation replaces methods on the
+instrumented objects only, so when it is off nothing is wrapped and there
+is no overhead.
+"""
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+STORAGE_METHODS = ('list_movies', 'iter_movies', 'get_movies', 'add_movie', 'add_movies',
+                   'delete_movie', 'update_movie', 'save_movies', 'flush')
+APP_METHODS = ('list_movies', 'add_movie', 'import_movies', 'delete_movie', 'update_movie',
+               'movie_stats', 'movie_analytics', 'generate_website', 'generate_paginated_website')
+# Methods whose results are rows of movies
+ROW_METHODS = ('list_movies', 'iter_movies', 'get_movies')
+# Linux reports the bytes a process read and wrote here
+PROC_IO = '/proc/self/io'
+
+
+def _io_counters():
+    """Return (bytes read, bytes written, size of PROC_IO) for this process, or None.
+
+    The next call counts this read of PROC_IO as bytes read, so callers
+    subtract its size from the difference.
+    """
+    try:
+        with open(PROC_IO) as file:
+            text = file.read()
+    except OSError:
+        return None
+    fields = dict(line.split(': ') for line in text.splitlines())
+    return int(fields['rchar']), int(fields['wchar']), len(text)
+
+
+class Metrics:
+    """Thread-safe timers, counters and gauges.
+
+    Gauges are callables read when a snapshot is taken, such as the hit
+    counters of a cache.
+    """
+
+    def __init__(self):
+        self.timers = {}
+        self.counters = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def record(self, name, seconds):
+        """Add one timing to the named timer."""
+        with self._lock:
+            count, total, longest = self.timers.get(name, (0, 0.0, 0.0))
+            self.timers[name] = (count + 1, total + seconds, max(longest, seconds))
+
+    def add(self, name, value=1):
+        """Add a value to the named counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        """Time the body of a with statement."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    @contextlib.contextmanager
+    def outermost(self, scope):
+        """Yield True unless this thread is already inside outermost(scope).
+
+        Used to count rows and bytes once for nested calls such as a
+        list_movies that calls iter_movies.
+        """
+        depths = self._local.__dict__.setdefault('depths', {})
+        depth = depths.get(scope, 0)
+        depths[scope] = depth + 1
+        try:
+            yield depth == 0
+        finally:
+            depths[scope] = depth
+
+    def snapshot(self):
+        """Return all metrics as a JSON-serializable dictionary."""
+        with self._lock:
+            timers = {
+                name: {'count': count, 'total': total, 'mean': total / count, 'max': longest}
+                for name, (count, total, longest) in sorted(self.timers.items())
+            }
+            counters = dict(sorted(self.counters.items()))
+        gauges = {name: gauge() for name, gauge in sorted(self.gauges.items())}
+        return {'timers': timers, 'counters': counters, 'gauges': gauges}
+
+
+def _wrap(metrics, obj, method_name, timer_name, rows=None, io=None, scope=None):
+    """Replace a method on one object with a timed version.
+
+    Args:
+        metrics (Metrics): Where to record.
+        obj: The object whose method is wrapped; its class is not changed.
+        method_name (str): The method to wrap.
+        timer_name (str): The timer to record calls under.
+        rows (str): Counter for the rows returned or yielded, if any.
+        io (str): Prefix of counters for bytes read and written, if any.
+        scope (str): Rows and bytes are only counted for the outermost call
+            within a scope; defaults to the first part of timer_name.
+    """
+    import inspect
+    method = getattr(obj, method_name, None)
+    if method is None:
+        return
+    scope = scope or timer_name.split('.')[0]
+
+    def measure(result_rows, before):
+        if rows is not None and result_rows is not None:
+            metrics.add(rows, result_rows)
+        if before is not None:
+            after = _io_counters()
+            metrics.add(f'{io}.bytes_read', after[0] - before[0] - before[2])
+            metrics.add(f'{io}.bytes_written', after[1] - before[1])
+
+    if inspect.isgeneratorfunction(method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            with metrics.outermost(scope) as outermost, metrics.timer(timer_name):
+                before = _io_counters() if io and outermost else None
+                count = 0
+                for item in method(*args, **kwargs):
+                    count += 1
+                    yield item
+                measure(count if outermost else None, before)
+    else:
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            with metrics.outermost(scope) as outermost, metrics.timer(timer_name):
+                before = _io_counters() if io and outermost else None
+                result = method(*args, **kwargs)
+                count = len(result) if outermost and hasattr(result, '__len__') else None
+                measure(count, before)
+                return result
+
+    setattr(obj, method_name, wrapper)
+
+
+def instrument_storage(metrics, storage, name='storage'):
+    """Time the storage methods and count the rows and bytes they move.
+
+    For a storage that caches its movies, the ``<name>.reload`` timer
+    counts the times it had to parse its file again.
+    """
+    for method_name in STORAGE_METHODS:
+        _wrap(metrics, storage, method_name, f'{name}.{method_name}',
+              rows=f'{name}.rows' if method_name in ROW_METHODS else None, io=name)
+    if hasattr(storage, '_load'):
+        _wrap(metrics, storage, '_load', f'{name}.reload', rows=f'{name}.rows_parsed',
+              scope=f'{name}.reload')
+    return storage
+
+
+def instrument_omdb(metrics, client):
+    """Time OMDb lookups and API requests and expose the cache counters."""
+    _wrap(metrics, client, 'fetch', 'omdb.fetch')
+    _wrap(metrics, client, 'fetch_by_id', 'omdb.fetch_by_id')
+    _wrap(metrics, client, 'fetch_many', 'omdb.fetch_many', rows='omdb.titles')
+    _wrap(metrics, client, '_get', 'omdb.api_request')
+    if client.cache is not None:
+        metrics.gauges['omdb.cache.hits'] = lambda: client.cache.hits
+        metrics.gauges['omdb.cache.misses'] = lambda: client.cache.misses
+    return client
+
+
+def _instrument_created(app, factory_name, instrument):
+    """Instrument what an app factory such as _omdb_client returns, once, when it is created."""
+    factory = getattr(app, factory_name)
+    instrumented = []
+
+    def wrapper():
+        created = factory()
+        if created is not None and not any(created is seen for seen in instrumented):
+            instrument(created)
+            instrumented.append(created)
+        return created
+
+    setattr(app, factory_name, wrapper)
+
+
+def _instrument_posters(metrics, posters):
+    _wrap(metrics, posters, 'fetch_all', 'posters.fetch_all')
+    _wrap(metrics, posters, 'localize', 'posters.localize')
+
+
+def _instrument_website(metrics, website):
+    _wrap(metrics, website, 'build', 'site.build')
+    metrics.gauges['site.rendered'] = lambda: website.rendered
+
+
+def instrument_app(metrics, app):
+    """Time MovieApp's commands, site generation, poster downloads and OMDb calls."""
+    for method_name in APP_METHODS:
+        _wrap(metrics, app, method_name, f'app.{method_name}')
+    _instrument_created(app, '_omdb_client', lambda client: instrument_omdb(metrics, client))
+    _instrument_created(app, '_poster_cache', lambda posters: _instrument_posters(metrics, posters))
+    _instrument_created(app, '_website_builder', lambda website: _instrument_website(metrics, website))
+    return app
+
+
+def _write_metrics(metrics, path):
+    """Write the metrics snapshot as JSON to path, or to stderr for '-'."""
+    snapshot = metrics.snapshot()
+    if path == '-':
+        json.dump(snapshot, sys.stderr, indent=2)
+        print(file=sys.stderr)
+        return
+    with open(path, 'w') as file:
+        json.dump(snapshot, file, indent=2)
+    print(f"Metrics written to '{path}'.", file=sys.stderr)
+
+
+@contextlib.contextmanager
+def session(metrics_path=None, profile_path=None):
+    """Collect metrics and a profile for the body of a with statement.
+
+    Falls back to the MOVIE_METRICS and MOVIE_PROFILE environment variables.
+
+    Yields:
+        Metrics: The metrics to instrument objects with, or None if
+        metrics are disabled.
+    """
+    metrics_path = metrics_path or os.getenv('MOVIE_METRICS')
+    profile_path = profile_path or os.getenv('MOVIE_PROFILE')
+    metrics = Metrics() if metrics_path else None
+    profiler = None
+    if profile_path:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield metrics
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        if metrics is not None:
+            _write_metrics(metrics, metrics_path)
+        if profiler is not None:
+            import pstats
+            print(f"Profile written to '{profile_path}'.", file=sys.stderr)
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(15)
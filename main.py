@@ -1,16 +1,242 @@
+import argparse
+import shlex
+import sys
+import instrumentation
 from movie_app import MovieApp
-from storage.storage_csv import StorageCsv
+from storage.storage_csv_cached import StorageCsvCached
+from storage.indexed_storage import IndexedStorage
+from storage.session_storage import SessionStorage
+from storage.locking import StorageConflictError
+from storage.watcher import StorageWatcher
+from search_index import SearchIndex
+from rating_stats import RatingStatistics
+from sort_index import SortIndex
+from random_index import RandomIndex
 
+STORAGE_FILE = 'data/storage.csv'
+# Queries a backend may answer itself, mapped to the index that answers them otherwise
+BACKEND_QUERIES = {
+    'search_movie': SearchIndex,
+    'rating_statistics': RatingStatistics,
+    'range_query': SortIndex
+}
 
-def main():
+
+class _ScriptParser(argparse.ArgumentParser):
+    """Argument parser for script lines that raises instead of exiting."""
+
+    def error(self, message):
+        raise ValueError(message)
+
+
+def _add_commands(parser):
+    """Add the movie subcommands to a parser and return their subparsers."""
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.add_parser('list', help="List all movies")
+
+    add = commands.add_parser('add', help="Add a movie, from OMDb unless --rating is given")
+    add.add_argument('title')
+    add.add_argument('--year', type=int)
+    add.add_argument('--rating', type=float)
+    add.add_argument('--poster', default='')
+
+    import_titles = commands.add_parser('import', help="Import movies from a file of titles")
+    import_titles.add_argument('path')
+
+    delete = commands.add_parser('delete', help="Delete a movie")
+    delete.add_argument('title')
+
+    update = commands.add_parser('update', help="Update a movie's rating")
+    update.add_argument('title')
+    update.add_argument('rating', type=float)
+
+    commands.add_parser('stats', help="Show rating statistics")
+    commands.add_parser('analytics', help="Show per-decade averages, distribution, "
+                                          "correlation and percentiles")
+
+    generate = commands.add_parser('generate', help="Generate the website")
+    generate.add_argument('--paginated', action='store_true',
+                          help="Generate the paginated website in 'site'")
+    return commands
+
+
+def build_parser():
+    """Return the command line parser."""
+    parser = argparse.ArgumentParser(
+        description="Manage the movie collection. Without a command the interactive menu starts."
+    )
+    parser.add_argument('--file', default=STORAGE_FILE,
+                        help="The storage file: CSV, or SQLite for .sqlite and .db")
+    parser.add_argument('--metrics', metavar='FILE',
+                        help="Write timers and counters as JSON to FILE on exit, '-' for stderr")
+    parser.add_argument('--profile', metavar='FILE', help="Save a cProfile report to FILE on exit")
+    commands = _add_commands(parser)
+    batch = commands.add_parser(
+        'batch', help="Run commands from a script, one per line, with a single load and save"
+    )
+    batch.add_argument('script', nargs='?', type=argparse.FileType('r'), default=sys.stdin,
+                       help="The script file; standard input if omitted")
+    watch = commands.add_parser(
+        'watch', help="Regenerate the website whenever the storage file changes"
+    )
+    watch.add_argument('--paginated', action='store_true',
+                       help="Also keep the paginated website in 'site' up to date")
+    watch.add_argument('--interval', type=float, default=0.5,
+                       help="Seconds between checks of the file")
+    watch.add_argument('--debounce', type=float, default=1.0,
+                       help="Seconds the file must stay unchanged before regenerating")
+    return parser
+
+
+def run_command(app, args):
+    """Run one parsed command against the app."""
+    if args.command == 'list':
+        app.list_movies()
+    elif args.command == 'add':
+        app.add_movie(args.title, args.year, args.rating, args.poster)
+    elif args.command == 'import':
+        app.import_movies(args.path)
+    elif args.command == 'delete':
+        app.delete_movie(args.title)
+    elif args.command == 'update':
+        app.update_movie(args.title, args.rating)
+    elif args.command == 'stats':
+        app.movie_stats()
+    elif args.command == 'analytics':
+        app.movie_analytics()
+    elif args.command == 'generate':
+        if args.paginated:
+            app.generate_paginated_website()
+        else:
+            app.generate_website()
+
+
+def run_batch(app, lines):
+    """Run every command in a script. Blank lines and lines starting with # are skipped.
+
+    All lines are parsed before any is run, so a typo does not leave the
+    script half applied. Movies added from OMDb are fetched concurrently
+    up front.
+
+    Returns:
+        bool: True if every line was valid.
+    """
+    parser = _ScriptParser(prog='batch', add_help=False)
+    _add_commands(parser)
+
+    commands = []
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            args = parser.parse_args(shlex.split(line))
+            if args.command is None:
+                raise ValueError("missing command")
+        except ValueError as e:
+            print(f"Error on line {number}: {e}")
+            return False
+        commands.append(args)
+
+    app.prefetch(command.title for command in commands
+                 if command.command == 'add' and command.rating is None)
+    for args in commands:
+        run_command(app, args)
+    return True
+
+
+def main(argv=None):
     """
     Main function to initialize the storage and the MovieApp instance,
     and start running the application.
+
+    A command on the command line runs directly against the storage, so an
+    add appends one row and an update changes one. The commands of a batch
+    script run against one session that loads the storage once and saves
+    it once at the end. --metrics and --profile, or the MOVIE_METRICS
+    and MOVIE_PROFILE environment variables, turn on instrumentation.
     """
-    storage = StorageCsv('data/storage.csv')
-    app = MovieApp(storage)
-    app.run()
+    args = build_parser().parse_args(argv)
+    with instrumentation.session(args.metrics, args.profile) as metrics:
+        return _run(args, metrics)
+
+
+def open_backend(file_path):
+    """Return the storage for a file: SQLite for .sqlite and .db, otherwise cached CSV."""
+    if file_path.lower().endswith(('.sqlite', '.db')):
+        from storage.storage_sqlite import StorageSqlite
+        return StorageSqlite(file_path)
+    return StorageCsvCached(file_path)
+
+
+def _indexes(backend):
+    """Return the in-memory indexes for the queries the backend cannot answer itself."""
+    indexes = [index_type() for method, index_type in BACKEND_QUERIES.items()
+               if not hasattr(backend, method)]
+    return indexes + [RandomIndex()]
+
+
+def _run(args, metrics):
+    """Run the interactive menu or the commands given on the command line."""
+    if args.command == 'watch':
+        return _watch(args, metrics)
+
+    backend = open_backend(args.file)
+    if metrics is not None:
+        instrumentation.instrument_storage(metrics, backend)
+
+    if args.command is None:
+        storage = IndexedStorage(backend, _indexes(backend))
+        app = MovieApp(storage)
+        if metrics is not None:
+            instrumentation.instrument_app(metrics, app)
+        # Rebuild the indexes when another process changes the storage
+        watcher = StorageWatcher(storage, lock=app.lock)
+        watcher.start()
+        try:
+            app.run()
+        finally:
+            watcher.stop()
+        return 0
+
+    if args.command != 'batch':
+        app = MovieApp(backend)
+        if metrics is not None:
+            instrumentation.instrument_app(metrics, app)
+        run_command(app, args)
+        return 0
+
+    session = SessionStorage(backend)
+    app = MovieApp(session)
+    if metrics is not None:
+        instrumentation.instrument_app(metrics, app)
+    with args.script:
+        ok = run_batch(app, args.script)
+    if not ok:
+        return 1
+
+    try:
+        session.flush()
+    except StorageConflictError as e:
+        print(f"Error: {e} No changes were saved.")
+        return 1
+    return 0
+
 
+def _watch(args, metrics):
+    """Keep the website up to date with the storage file, which may also be a data.json file."""
+    if args.file.endswith('.json'):
+        from storage.storage_json import StorageJson
+        backend = StorageJson(args.file)
+    else:
+        backend = open_backend(args.file)
+    if metrics is not None:
+        instrumentation.instrument_storage(metrics, backend)
+    app = MovieApp(backend)
+    if metrics is not None:
+        instrumentation.instrument_app(metrics, app)
+    app.watch(args.paginated, args.interval, args.debounce)
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
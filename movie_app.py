@@ -1,13 +1,14 @@
-import requests
-import os
-from dotenv import load_dotenv
-import movie_storage
-from storage.storage_csv import StorageCsv
+import threading
+import time
+from settings import getenv
+from web_generator import WebsiteBuilder, write_paginated_website
+from search_index import SearchIndex, DISPLAY_LIMIT
+from rating_stats import RatingStatistics
+from sort_index import SortIndex
+from random_index import RandomIndex
 
-# Load environment variables from .env file
-load_dotenv()
-
-api_key = os.getenv("OMDB_API_KEY")
+# The OMDb client, the poster cache and the .env file are loaded on first
+# use, so commands that do not need them start without importing requests.
 
 
 class MovieApp:
@@ -18,12 +19,18 @@ class MovieApp:
             storage: An instance of the storage class for managing movies.
         """
         self._storage = storage
+        # Held while a menu command runs, so a StorageWatcher's rebuild waits for it
+        self.lock = threading.RLock()
+        self._client = None
+        self._posters = None
+        self._website = None
+        self._analytics = None
 
     def run(self):
         movies = self.storage.list_movies()
         print(movies)
 
-    def _command_list_movies(self):
+    def list_movies(self):
         """List all movies in the storage.
 
         Retrieves movies from the storage and displays their title, rating, and year.
@@ -35,41 +42,276 @@ class MovieApp:
         else:
             print("No movies found.")
 
-    def _command_add_movie(self):
-        """Add a movie by fetching data from the OMDb API.
+    def _command_search_movies(self):
+        """Search movies by title.
+
+        Uses the storage's search index when there is one, which tolerates
+        typos and completes the last word and lists the best DISPLAY_LIMIT
+        matches; otherwise the backend's own search, such as a SQL query on
+        StorageSqlite, or a scan of every title.
+        """
+        query = input("Enter part of the movie title: ").strip()
+        index = self._index(SearchIndex)
+        more = False
+        if index is not None:
+            matches = []
+            titles = index.search(query, DISPLAY_LIMIT + 1)
+            more = len(titles) > DISPLAY_LIMIT
+            for title in titles[:DISPLAY_LIMIT]:
+                details = self._storage.get_movie(title)
+                if details is not None:
+                    matches.append((title, details))
+        elif hasattr(self._storage, 'search_movie'):
+            matches = self._storage.search_movie(query)
+        else:
+            matches = [(title, details) for title, details in self._storage.iter_movies()
+                       if query.lower() in title.lower()]
+
+        if matches:
+            for title, details in matches:
+                print(f"{title}: {details['rating']} ({details['year']})")
+            if more:
+                print(f"Showing the best {DISPLAY_LIMIT} matches; refine the search to see others.")
+        else:
+            print(f"No movie found matching '{query}'.")
+
+    def _index(self, index_type):
+        """Return the storage's index of the given type, or None."""
+        return next(
+            (index for index in getattr(self._storage, 'indexes', ())
+             if isinstance(index, index_type)),
+            None
+        )
+
+    def movie_stats(self):
+        """Print rating statistics, a rating histogram and per-year averages.
+
+        Uses the storage's incrementally maintained statistics when there
+        are any, or statistics computed by the backend, such as SQL queries
+        on StorageSqlite; otherwise computes them from a full listing.
+        """
+        stats = self._index(RatingStatistics)
+        if stats is None and hasattr(self._storage, 'rating_statistics'):
+            stats = self._storage.rating_statistics()
+        if stats is None:
+            stats = RatingStatistics()
+            stats.rebuild(self._storage.iter_movies())
+
+        summary = stats.summary()
+        if summary is None:
+            print("No rated movies found.")
+            return
+
+        print(f"\nMovies rated: {summary['count']}")
+        print(f"Average rating: {summary['average']:.2f}")
+        print(f"Median rating: {summary['median']:.2f}")
+        print(f"Best movie: {summary['best'][0]} - Rating: {summary['best'][1]}")
+        print(f"Worst movie: {summary['worst'][0]} - Rating: {summary['worst'][1]}")
+
+        print("\nRating histogram:")
+        for bucket, count in stats.histogram().items():
+            print(f"{bucket}-{bucket + 1}: {count} movies")
+
+        print("\nAverage rating by year:")
+        for year, (count, average) in stats.by_year().items():
+            print(f"{year}: {average:.2f} ({count} movies)")
+
+    def _catalog_analytics(self):
+        """Return the NumPy analytics of the storage, creating them on first use."""
+        if self._analytics is None:
+            from analytics import CatalogAnalytics
+            self._analytics = CatalogAnalytics(self._storage)
+        return self._analytics
+
+    def movie_analytics(self):
+        """Print per-decade averages, the rating distribution, year/rating correlation and percentiles.
+
+        The statistics are computed with NumPy over the whole catalog and
+        kept until the storage changes.
+        """
+        analytics = self._catalog_analytics()
+        summary = analytics.summary()
+        if summary is None:
+            print("No rated movies found.")
+            return
 
-        Prompts the user for a movie title, fetches its details from the OMDb API,
-        and stores the movie details in the storage system.
+        print(f"\nMovies rated: {summary['count']}")
+        print(f"Average rating: {summary['average']:.2f} "
+              f"(median {summary['median']:.2f}, standard deviation {summary['std']:.2f})")
+
+        print("\nAverage rating by decade:")
+        for decade, (count, average) in analytics.by_decade().items():
+            print(f"{decade}s: {average:.2f} ({count} movies)")
+
+        print("\nRating distribution:")
+        distribution = analytics.distribution()
+        largest = max(distribution.values())
+        for bucket, count in distribution.items():
+            bar = '#' * round(40 * count / largest) if largest else ''
+            label = f"{bucket}-{bucket + 1}:"
+            print(f"{label:<6}{count:>8} {bar}")
+
+        correlation = analytics.correlation()
+        if correlation and correlation['pearson'] is not None:
+            print(f"\nYear and rating correlation over {correlation['count']} movies: "
+                  f"Pearson {correlation['pearson']:+.3f}, Spearman {correlation['spearman']:+.3f}")
+            print(f"Trend: {correlation['slope_per_decade']:+.3f} rating points per decade")
+
+        table = analytics.percentiles()
+        percents = next(iter(table.values())).keys()
+        print("\nRating percentiles:")
+        print(f"{'':>6}" + ''.join(f"{'p' + str(percent):>7}" for percent in percents))
+        for group, values in table.items():
+            label = group if group == 'all' else f"{group}s"
+            print(f"{label:>6}" + ''.join(f"{value:>7.2f}" for value in values.values()))
+
+    def _command_top_movies(self):
+        """List the best rated movies, optionally within a rating and year range.
+
+        Answered from the storage's sort index when there is one, or by
+        the backend's own range_query, such as a SQL query on
+        StorageSqlite, so no full sort of the catalog is needed.
+        """
+        try:
+            count = int(input("How many movies? ") or 10)
+            min_rating = input("Minimum rating (blank for any): ").strip()
+            min_rating = float(min_rating) if min_rating else None
+            start_year = input("From year (blank for any): ").strip()
+            start_year = int(start_year) if start_year else None
+            end_year = input("To year (blank for any): ").strip()
+            end_year = int(end_year) if end_year else None
+        except ValueError as e:
+            print(f"Invalid input: {e}")
+            return
+
+        index = self._index(SortIndex)
+        if index is None and hasattr(self._storage, 'range_query'):
+            index = self._storage
+        if index is None:
+            index = SortIndex()
+            index.rebuild(self._storage.iter_movies())
+        titles = index.range_query(min_rating=min_rating, start_year=start_year,
+                                   end_year=end_year, limit=count)
+
+        if not titles:
+            print("No movies found.")
+            return
+        for title in titles:
+            details = self._storage.get_movie(title)
+            if details is not None:
+                print(f"{title}: {details['rating']} ({details['year']})")
+
+    def _command_random_movie(self):
+        """Pick a random movie, optionally weighted by rating or filtered.
+
+        Uses the storage's random index when there is one, so a pick does
+        not copy the catalog.
         """
-        api_key = os.getenv("OMDB_API_KEY")
-        if not api_key:
-            print("Error: API key not found. Please set OMDB_API_KEY in your .env file.")
+        mode = input("Pick (u)niformly, (w)eighted by rating or (f)iltered? ").strip().lower()
+        index = self._index(RandomIndex)
+        if index is None:
+            index = RandomIndex()
+            index.rebuild(self._storage.iter_movies())
+
+        if mode == "w":
+            title = index.pick_weighted()
+        elif mode == "f":
+            try:
+                min_rating = input("Minimum rating (blank for any): ").strip()
+                min_rating = float(min_rating) if min_rating else None
+                start_year = input("From year (blank for any): ").strip()
+                start_year = int(start_year) if start_year else None
+                end_year = input("To year (blank for any): ").strip()
+                end_year = int(end_year) if end_year else None
+            except ValueError as e:
+                print(f"Invalid input: {e}")
+                return
+            title = index.pick(min_rating=min_rating, start_year=start_year, end_year=end_year)
+        else:
+            title = index.pick()
+
+        if title is None:
+            print("No movies found.")
             return
+        details = self._storage.get_movie(title)
+        print(f"Randomly selected movie: {title}: {details['rating']} ({details['year']})")
+
+    def _omdb_client(self):
+        """Return the shared OMDb client, creating it on first use.
 
+        Returns None and prints an error if the API key is not configured.
+        """
+        if self._client is None:
+            api_key = getenv("OMDB_API_KEY")
+            if not api_key:
+                print("Error: API key not found. Please set OMDB_API_KEY in your .env file.")
+                return None
+            from omdb_client import OmdbClient
+            from omdb_cache import OmdbCache, CACHE_FILE
+            cache = OmdbCache(
+                getenv("OMDB_CACHE_FILE", CACHE_FILE),
+                ttl=float(getenv("OMDB_CACHE_TTL", 7 * 24 * 3600)),
+                max_entries=int(getenv("OMDB_CACHE_SIZE", "10000"))
+            )
+            self._client = OmdbClient(
+                api_key,
+                max_workers=int(getenv("OMDB_MAX_WORKERS", "8")),
+                rate_limit=float(getenv("OMDB_RATE_LIMIT", "10")),
+                cache=cache
+            )
+        return self._client
+
+    def _poster_cache(self):
+        """Return the poster cache, creating it on first use, or None if LOCAL_POSTERS is off."""
+        if self._posters is None and getenv("LOCAL_POSTERS", "1") == "1":
+            from poster_cache import PosterCache, RETRY_AFTER
+            self._posters = PosterCache(
+                retry_after=float(getenv("POSTER_RETRY_AFTER", RETRY_AFTER))
+            )
+        return self._posters
+
+    def _website_builder(self):
+        """Return the incremental website builder, loading its cache on first use."""
+        if self._website is None:
+            self._website = WebsiteBuilder(
+                "movie_list.html", "My Movie List", cache_file="data/site_cache.sqlite"
+            )
+        return self._website
+
+    def _command_add_movie(self):
+        """Prompt for a movie title and add the movie from the OMDb API."""
         title = input("Enter the movie title: ")
-        url = f"http://www.omdbapi.com/?apikey={api_key}&t={title}"
+        self.add_movie(title)
+
+    def add_movie(self, title, year=None, rating=None, poster=''):
+        """Add a movie, fetching its details from the OMDb API unless a rating is given.
+
+        Args:
+            title (str): The movie title, or the title to look up.
+            year: The release year, used when the rating is given.
+            rating (float): The rating; if None the movie is fetched from OMDb.
+            poster (str): The poster URL, used when the rating is given.
+        """
+        if rating is not None:
+            self._storage.add_movie(title, year, rating, poster)
+            print(f"Movie '{title}' added successfully!")
+            return
+
+        client = self._omdb_client()
+        if client is None:
+            return
+        import requests
+        from omdb_client import movie_from_omdb
 
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
+            data = client.fetch(title)
 
             # Handle if movie not found
-            if data.get('Response') == 'False':
+            if data is None:
                 print(f"Movie '{title}' not found in OMDb API.")
                 return
 
-            # Extract required fields
-            movie_title = data.get('Title')
-            year = data.get('Year')
-            rating = data.get('imdbRating')
-            poster = data.get('Poster')
-
-            # Check if rating is valid and convert to float
-            if rating and rating != "N/A":
-                rating = float(rating)
-            else:
-                rating = None  # Handle case where rating is not available
+            movie_title, year, rating, poster = movie_from_omdb(data)
 
             # Store movie details in your storage
             self._storage.add_movie(movie_title, year, rating, poster)
@@ -78,68 +320,146 @@ class MovieApp:
         except requests.exceptions.RequestException as e:
             print(f"Error: Could not access the API. {e}")
 
-    def _generate_website(self):
+    def prefetch(self, titles):
+        """Fetch movies from the OMDb API concurrently to warm the OMDb cache.
+
+        Later add_movie calls for these titles are answered from the cache.
+        """
+        titles = list(dict.fromkeys(titles))
+        client = self._omdb_client() if titles else None
+        if client is None or client.cache is None:
+            return
+        for _ in client.fetch_many(titles):
+            pass
+
+    def delete_movie(self, title):
+        """Delete a movie from the storage."""
+        self._storage.delete_movie(title)
+
+    def update_movie(self, title, rating):
+        """Update a movie's rating in the storage."""
+        self._storage.update_movie(title, rating)
+
+    def _command_import_movies(self):
+        """Prompt for a titles file and import the movies listed in it."""
+        path = input("Enter the path of the titles file: ").strip()
+        self.import_movies(path)
+
+    def import_movies(self, path):
+        """Import movies listed in a text file, one title per line.
+
+        Titles are fetched from the OMDb API concurrently and all found
+        movies are written to the storage in a single batch.
+        """
+        client = self._omdb_client()
+        if client is None:
+            return
+        from omdb_client import movie_from_omdb
+
+        try:
+            with open(path, 'r') as file:
+                titles = list(dict.fromkeys(line.strip() for line in file if line.strip()))
+        except OSError as e:
+            print(f"Error: Could not read '{path}'. {e}")
+            return
+
+        movies = {}
+        not_found = 0
+        failed = 0
+        for title, data, error in client.fetch_many(titles):
+            if error is not None:
+                print(f"Error: Could not fetch '{title}'. {error}")
+                failed += 1
+            elif data is None:
+                not_found += 1
+            else:
+                movie_title, year, rating, poster = movie_from_omdb(data)
+                movies[movie_title] = {'rating': rating, 'year': year, 'poster': poster}
+
+        if movies:
+            self._storage.add_movies(movies)
+        print(f"Imported {len(movies)} movies ({not_found} not found, {failed} failed).")
+        if client.cache is not None:
+            print(f"OMDb cache: {client.cache.hits} hits, {client.cache.misses} misses.")
+
+    def generate_website(self):
         """Generate an HTML file to display the list of movies.
 
-        Creates a simple HTML page containing the list of movies stored in the system.
+        Only movies that changed since the last run are rendered again, and
+        the file is left untouched if the page did not change.
+        """
+        movies = self._storage.iter_movies()
+        posters = self._poster_cache()
+        if posters is not None:
+            posters.fetch_all(details.get('poster') for _, details in movies)
+            movies = posters.localize(self._storage.iter_movies())
+        website = self._website_builder()
+        if website.build(movies):
+            print(f"Website generated successfully as 'movie_list.html' "
+                  f"({website.rendered} movies rendered).")
+        else:
+            print("Website 'movie_list.html' is already up to date.")
+
+    def generate_paginated_website(self):
+        """Generate a paginated website in the 'site' directory.
+
+        Writes pages of movies sorted by title, year and rating, plus an
+        index.json describing the pages.
         """
+        per_page = int(getenv("SITE_PAGE_SIZE", "100"))
         movies = self._storage.list_movies()
+        posters = self._poster_cache()
+        if posters is not None:
+            posters.fetch_all(details.get('poster') for details in movies.values())
+            movies = dict(posters.localize(movies, "site"))
+        index = write_paginated_website(movies, "site", "My Movie List", per_page=per_page)
+        pages = sum(len(pages) for pages in index['orders'].values())
+        print(f"Paginated website generated in 'site' ({pages} pages, "
+              f"{index['written']} rewritten).")
 
-        # HTML template
-        html_content = """
-                <html>
-                    <head>
-                        <title>My Movie List</title>
-                        <style>
-                            body {
-                                font-family: Arial, sans-serif;
-                                background-color: #f4f4f9;
-                                color: #333;
-                                margin: 20px;
-                            }
-                            h1 {
-                                text-align: center;
-                            }
-                            .movie {
-                                border: 1px solid #ddd;
-                                padding: 10px;
-                                margin-bottom: 10px;
-                                border-radius: 5px;
-                                background-color: #fff;
-                            }
-                            .movie h2 {
-                                margin: 0;
-                            }
-                            .movie p {
-                                margin: 5px 0;
-                            }
-                        </style>
-                    </head>
-                    <body>
-                        <h1>My Movie List</h1>
-                """
-
-        # Inject movie data into the HTML
-        for title, info in movies.items():
-            html_content += f"""
-                        <div class="movie">
-                            <h2>{title}</h2>
-                            <p>Rating: {info['rating']}</p>
-                            <p>Year: {info['year']}</p>
-                        </div>
-                    """
-
-        # Closing HTML tags
-        html_content += """
-                    </body>
-                </html>
-                """
-
-        # Write the HTML to a file
-        with open("movie_list.html", "w") as file:
-            file.write(html_content)
-
-        print("Website generated successfully as 'movie_list.html'.")
+    def watch(self, paginated=False, interval=0.5, debounce=1.0):
+        """Regenerate the website whenever the storage changes, until interrupted.
+
+        Edits from other processes are picked up by polling and a burst of
+        them is handled once it has settled. A failed regeneration, for
+        example while another process is still rewriting the file, is
+        reported and retried on the next change. Only the output that changed
+        is rewritten: the website re-renders changed movies only, and the
+        paginated site rewrites only the pages whose content changed.
+
+        Args:
+            paginated (bool): Also keep the paginated website in 'site' up to date.
+            interval (float): Seconds between checks of the storage.
+            debounce (float): Seconds the storage must stay unchanged before
+                the website is regenerated.
+        """
+        from storage.watcher import StorageWatcher
+        changes = []
+        self._storage.subscribe(changes.append)
+        watcher = StorageWatcher(self._storage, interval, debounce)
+
+        def regenerate():
+            try:
+                self.generate_website()
+                if paginated:
+                    self.generate_paginated_website()
+            except Exception as e:
+                print(f"Error: Could not regenerate the website: {e}. "
+                      f"Retrying on the next change.")
+
+        regenerate()
+        print("Watching for changes. Press Ctrl+C to stop.")
+        try:
+            while True:
+                time.sleep(interval)
+                watcher.poll()
+                if changes:
+                    changes.clear()
+                    regenerate()
+        except KeyboardInterrupt:
+            print("Stopped watching.")
+        finally:
+            self._storage.unsubscribe(changes.append)
 
     def run(self):
         """Run the main loop for the movie app.
@@ -151,18 +471,40 @@ class MovieApp:
             print("1. List Movies")
             print("2. Add Movie")
             print("3. Generate Website")
-            print("4. Quit")
+            print("4. Import Movies From File")
+            print("5. Generate Paginated Website")
+            print("6. Search Movies")
+            print("7. Movie Statistics")
+            print("8. Top Movies")
+            print("9. Random Movie")
+            print("10. Movie Analytics")
+            print("11. Quit")
 
             choice = input("Enter your choice: ")
 
-            if choice == "1":
-                self._command_list_movies()
-            elif choice == "2":
-                self._command_add_movie()
-            elif choice == "3":
-                self._generate_website()
-            elif choice == "4":
-                print("Exiting the app.")
-                break
-            else:
-                print("Invalid choice, try again.")
+            with self.lock:
+                if choice == "1":
+                    self.list_movies()
+                elif choice == "2":
+                    self._command_add_movie()
+                elif choice == "3":
+                    self.generate_website()
+                elif choice == "4":
+                    self._command_import_movies()
+                elif choice == "5":
+                    self.generate_paginated_website()
+                elif choice == "6":
+                    self._command_search_movies()
+                elif choice == "7":
+                    self.movie_stats()
+                elif choice == "8":
+                    self._command_top_movies()
+                elif choice == "9":
+                    self._command_random_movie()
+                elif choice == "10":
+                    self.movie_analytics()
+                elif choice == "11":
+                    print("Exiting the app.")
+                    break
+                else:
+                    print("Invalid choice, try again.")
@@ -0,0 +1,193 @@
+import math
+import sys
+from array import array
+from collections.abc import MutableMapping
+from storage.normalize import parse_rating
+
+# Sentinel stored in the years column when the year is not a plain integer
+NO_YEAR = 0
+
+
+class MovieRecord(MutableMapping):
+    """View of one movie in a MovieCatalog that behaves like its details dict.
+
+    Reading and writing ``record['rating']`` and friends goes straight to
+    the catalog's columns, so helpers written for the dict-of-dicts format
+    keep working.
+    """
+
+    __slots__ = ('_catalog', '_title')
+
+    def __init__(self, catalog, title):
+        self._catalog = catalog
+        self._title = title
+
+    def __getitem__(self, key):
+        return self._catalog._get_field(self._title, key)
+
+    def __setitem__(self, key, value):
+        self._catalog._set_field(self._title, key, value)
+
+    def __delitem__(self, key):
+        self._catalog._set_field(self._title, key, None)
+
+    def __iter__(self):
+        return iter(self._catalog._fields(self._title))
+
+    def __len__(self):
+        return len(self._catalog._fields(self._title))
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class MovieCatalog(MutableMapping):
+    """Compact, column-oriented replacement for the dict of movie dicts.
+
+    Ratings are stored in an ``array('f')`` (NaN for missing), plain
+    integer years in an ``array('H')`` and titles and posters as interned
+    strings in lists, with a title -> row map. Non-integer years such as
+    ``2017–2024`` and any extra fields such as ``plot`` are kept in small
+    side tables. ``catalog[title]`` returns a MovieRecord view, so code
+    that expects ``movies[title]['rating']`` works unchanged.
+
+    Ratings are single precision and rounded to 4 decimals when read.
+    Deleting a movie moves the last movie into its row.
+    """
+
+    def __init__(self, movies=None):
+        self._rows = {}
+        self._titles = []
+        self._ratings = array('f')
+        self._years = array('H')
+        self._posters = []
+        self._year_text = {}
+        self._extra = {}
+        if movies:
+            self.update(movies)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build a catalog from an iterable of (title, details) pairs."""
+        catalog = cls()
+        for title, details in rows:
+            catalog[title] = details
+        return catalog
+
+    def _fields(self, title):
+        """Return the field names present for a movie."""
+        row = self._rows[title]
+        fields = ['rating', 'year']
+        if self._posters[row] is not None:
+            fields.append('poster')
+        fields.extend(self._extra.get(row, ()))
+        return fields
+
+    def _get_field(self, title, key):
+        row = self._rows[title]
+        if key == 'rating':
+            rating = self._ratings[row]
+            return None if math.isnan(rating) else round(rating, 4)
+        if key == 'year':
+            year = self._years[row]
+            return self._year_text.get(row) if year == NO_YEAR else year
+        if key == 'poster' and self._posters[row] is not None:
+            return self._posters[row]
+        extra = self._extra.get(row)
+        if extra is not None and key in extra:
+            return extra[key]
+        raise KeyError(key)
+
+    def _set_field(self, title, key, value):
+        row = self._rows[title]
+        if key == 'rating':
+            rating = parse_rating(value)
+            self._ratings[row] = math.nan if rating is None else rating
+        elif key == 'year':
+            self._year_text.pop(row, None)
+            if isinstance(value, int) and 0 < value < 65536:
+                self._years[row] = value
+            else:
+                self._years[row] = NO_YEAR
+                if value is not None:
+                    self._year_text[row] = sys.intern(str(value))
+        elif key == 'poster':
+            self._posters[row] = None if value is None else sys.intern(value)
+        elif value is None:
+            extra = self._extra.get(row)
+            if extra is not None:
+                extra.pop(key, None)
+                if not extra:
+                    del self._extra[row]
+        else:
+            self._extra.setdefault(row, {})[key] = value
+
+    def __getitem__(self, title):
+        if title not in self._rows:
+            raise KeyError(title)
+        return MovieRecord(self, title)
+
+    def __setitem__(self, title, details):
+        details = dict(details)
+        if title not in self._rows:
+            title = sys.intern(title)
+            self._rows[title] = len(self._titles)
+            self._titles.append(title)
+            self._ratings.append(math.nan)
+            self._years.append(NO_YEAR)
+            self._posters.append(None)
+        else:
+            row = self._rows[title]
+            self._year_text.pop(row, None)
+            self._extra.pop(row, None)
+            self._posters[row] = None
+        for key in ('rating', 'year'):
+            self._set_field(title, key, details.get(key))
+        for key, value in details.items():
+            if key not in ('rating', 'year'):
+                self._set_field(title, key, value)
+
+    def __delitem__(self, title):
+        row = self._rows.pop(title)
+        last = len(self._titles) - 1
+        year_text = self._year_text.pop(last, None)
+        extra = self._extra.pop(last, None)
+        self._year_text.pop(row, None)
+        self._extra.pop(row, None)
+        if row != last:
+            moved = self._titles[last]
+            self._titles[row] = moved
+            self._ratings[row] = self._ratings[last]
+            self._years[row] = self._years[last]
+            self._posters[row] = self._posters[last]
+            if year_text is not None:
+                self._year_text[row] = year_text
+            if extra is not None:
+                self._extra[row] = extra
+            self._rows[moved] = row
+        self._titles.pop()
+        self._ratings.pop()
+        self._years.pop()
+        self._posters.pop()
+
+    def __iter__(self):
+        return iter(self._titles)
+
+    def __len__(self):
+        return len(self._titles)
+
+    def __contains__(self, title):
+        return title in self._rows
+
+    def columns(self):
+        """Return the titles, ratings and years columns and the non-integer years.
+
+        The columns are the catalog's own list and arrays, not copies, so
+        they must not be changed. Rows whose years column holds NO_YEAR
+        have their year, if any, in the returned {row: year} dictionary.
+        """
+        return self._titles, self._ratings, self._years, self._year_text
+
+    def to_dict(self):
+        """Return the movies as a plain dictionary of dictionaries."""
+        return {title: dict(record) for title, record in self.items()}
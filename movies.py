@@ -1,15 +1,11 @@
+import heapq
 import json
 import random
-from statistics import median
-import requests
-from dotenv import load_dotenv
-import os
+from search_index import DISPLAY_LIMIT
+from settings import getenv
+from storage.normalize import year_range
 
-# Load environment variables from .env file
-load_dotenv()
-
-# Constants for the API URL and API key
-OMDB_API_KEY = os.getenv('OMDB_API_KEY')
+# Default OMDb API URL; OMDB_API_URL in the environment or .env overrides it
 API_URL = "http://www.omdbapi.com/"
 
 # Path to JSON file where movie data will be stored
@@ -18,34 +14,52 @@ JSON_FILE = "data/data.json"
 class MovieClass:
     def __init__(self, storage):
         self.storage = storage
-        # Ensure API key and URL are loaded correctly
-        if not OMDB_API_KEY:
-            raise ValueError("OMDB API key is missing.")
-        self.api_url = API_URL
+        self.api_url = None
+        self.client = None
+
+    def _get_client(self):
+        """
+        Create the OMDb client on first use, or return None if the API key is missing.
+
+        The API key and URL are read from the environment and the .env file
+        only now, and the HTTP libraries are imported only now.
+        """
+        if self.client is None:
+            api_key = getenv('OMDB_API_KEY')
+            if not api_key:
+                print("OMDB API key is missing.")
+                return None
+            from omdb_client import OmdbClient
+            from omdb_cache import OmdbCache
+            self.api_url = getenv("OMDB_API_URL", API_URL)
+            self.client = OmdbClient(api_key, api_url=self.api_url, cache=OmdbCache())
+        return self.client
 
     def fetch_movie_data(self, title):
         """
         Fetch movie data from the OMDb API based on the movie title.
         """
-        url = f"{self.api_url}?t={title}&apikey={OMDB_API_KEY}"
-        response = requests.get(url)
-
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('Response') == 'True':
-                return {
-                    'Title': data.get('Title'),
-                    'Year': data.get('Year'),
-                    'Rating': data.get('imdbRating'),
-                    'Plot': data.get('Plot')
-                }
-            else:
-                print(f"Movie '{title}' not found.")
-                return None
-        else:
+        client = self._get_client()
+        if client is None:
+            return None
+        import requests
+        try:
+            data = client.fetch(title)
+        except requests.exceptions.RequestException:
             print("Error fetching data from API.")
             return None
 
+        if data:
+            return {
+                'Title': data.get('Title'),
+                'Year': data.get('Year'),
+                'Rating': data.get('imdbRating'),
+                'Plot': data.get('Plot')
+            }
+        else:
+            print(f"Movie '{title}' not found.")
+            return None
+
     def save_movie_to_storage(self, movie_data):
         """
         Save movie data to storage (JSON file).
@@ -162,14 +176,32 @@ def update_movies(movies):
         print(f"Movie '{movie_update}' not found in the database.")
     return movies
 
-def rating_statistics(movies):
+def rating_statistics(movies, stats=None):
     """
     Calculate and display statistics for movie ratings.
+
+    If a RatingStatistics index is given, its incrementally maintained
+    values are printed instead of recomputing them from the movies.
     """
     if not movies:
         print("No movies found.")
         return
 
+    if stats is not None:
+        summary = stats.summary()
+        if summary is None:
+            print("No valid ratings found.")
+            return
+        best_movie, best_rating = summary['best']
+        worst_movie, worst_rating = summary['worst']
+        print(f"\nAverage rating: {summary['average']:.2f}")
+        print(f"Median rating: {summary['median']:.2f}")
+        print(f"Best movie: {best_movie} - Rating: {best_rating}")
+        print(f"Worst movie: {worst_movie} - Rating: {worst_rating}")
+        return
+
+    from statistics import median  # Imports decimal and fractions; only needed here
+
     # Filter valid ratings
     ratings = [movie_data['rating'] for movie_data in movies.values() if movie_data['rating'] is not None]
     if not ratings:
@@ -188,43 +220,92 @@ def rating_statistics(movies):
     print(f"Best movie: {best_movie} - Rating: {movies[best_movie]['rating']}")
     print(f"Worst movie: {worst_movie} - Rating: {movies[worst_movie]['rating']}")
 
-def random_movie(movies):
+def random_movie(movies, index=None):
     """
     Select and display a random movie from the collection.
+
+    If a RandomIndex is given, the pick is O(1) instead of copying the
+    whole collection into a list.
     """
     if not movies:
         print("No movies available.")
         return None
 
-    movie = random.choice(list(movies.items()))
+    if index is not None and len(index):
+        title = index.pick()
+        movie = (title, movies[title])
+    else:
+        movie = random.choice(list(movies.items()))
     print(f"Randomly selected movie: {movie[0]} with a rating of {movie[1]['rating']}")
     return movie
 
-def search_movie(movies):
+def search_movie(movies, index=None):
     """
     Search for a movie by name in the collection.
+
+    If a SearchIndex is given, the query is answered from the index with
+    fuzzy matching instead of scanning every title, and only the best
+    DISPLAY_LIMIT matches are listed.
     """
     movie_name = input("Please enter the movie you want to search: ").strip().lower()
 
-    found = False
-    for movie in movies:
-        if movie_name in movie.lower():
-            print(f"Movie '{movie}' found with rating {movies[movie]['rating']} and year {movies[movie]['year']}")
-            found = True
+    more = False
+    if index is not None:
+        found = index.search(movie_name, DISPLAY_LIMIT + 1)
+        more = len(found) > DISPLAY_LIMIT
+        matches = [movie for movie in found[:DISPLAY_LIMIT] if movie in movies]
+    else:
+        matches = [movie for movie in movies if movie_name in movie.lower()]
+
+    for movie in matches:
+        print(f"Movie '{movie}' found with rating {movies[movie]['rating']} and year {movies[movie]['year']}")
+    if more:
+        print(f"Showing the best {DISPLAY_LIMIT} matches; refine the search to see others.")
 
-    if not found:
+    if not matches:
         print(f"No movie found with '{movie_name}' in its title.")
 
-def sort_movie_by_year(movies):
+def _with_unindexed(ordered, movies):
+    """
+    Append the movies a SortIndex leaves out, such as unrated ones, to its order.
+
+    Sorting without an index puts them last, so both paths list the same movies.
+    """
+    indexed = {title for title, _ in ordered}
+    return ordered + [(title, details) for title, details in movies.items() if title not in indexed]
+
+def sort_movie_by_year(movies, index=None):
     """
     Sort movies by release year.
+
+    If a SortIndex is given, its pre-sorted order is used instead of sorting.
+    Movies without a year come last either way.
     """
-    sorted_movies_year = sorted(movies.items(), key=lambda x: x[1]['year'], reverse=True)
+    if index is not None:
+        return _with_unindexed(
+            [(title, movies[title]) for title in index.by_year() if title in movies], movies
+        )
+    sorted_movies_year = sorted(movies.items(), key=lambda x: year_range(x[1]['year'])[0] or 0,
+                                reverse=True)
     return sorted_movies_year
 
-def sort_movie_by_rating(movies):
+def sort_movie_by_rating(movies, index=None):
     """
     Sort movies by rating in descending order.
+
+    If a SortIndex is given, its pre-sorted order is used instead of sorting.
+    Unrated movies come last either way.
     """
-    sorted_movies = sorted(movies.items(), key=lambda x: x[1]['rating'], reverse=True)
+    if index is not None:
+        return _with_unindexed(
+            [(title, movies[title]) for title in index.by_rating() if title in movies], movies
+        )
+    sorted_movies = sorted(movies.items(), key=lambda x: x[1]['rating'] or 0, reverse=True)
     return sorted_movies
+
+def top_movies_by_rating(movies, k=10):
+    """
+    Return the k best rated movies using a heap instead of a full sort.
+    """
+    rated = ((title, details) for title, details in movies.items() if details['rating'] is not None)
+    return heapq.nlargest(k, rated, key=lambda x: x[1]['rating'])
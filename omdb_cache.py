@@ -0,0 +1,117 @@
+import json
+import sqlite3
+import threading
+import time
+
+# Default location of the on-disk response cache
+CACHE_FILE = "data/omdb_cache.sqlite"
+
+SCHEMA = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed);
+"""
+
+
+def title_key(title):
+    """Return the cache key for a title, ignoring case and extra whitespace."""
+    return "t:" + " ".join(title.split()).casefold()
+
+
+def imdb_key(imdb_id):
+    """Return the cache key for an imdbID."""
+    return "i:" + imdb_id.strip().lower()
+
+
+class OmdbCache:
+    """Persistent cache of OMDb responses stored in SQLite.
+
+    Entries expire after ``ttl`` seconds; "not found" responses use the
+    shorter ``negative_ttl``. Once more than ``max_entries`` are stored the
+    least recently used entries are evicted.
+    """
+
+    def __init__(self, file_path=CACHE_FILE, ttl=7 * 24 * 3600, negative_ttl=24 * 3600,
+                 max_entries=10000):
+        self.file_path = file_path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(file_path, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+        self._size = self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get(self, key):
+        """Return the cached response for a key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT payload, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            payload, expires = row
+            with self._connection:
+                if expires <= now:
+                    self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._size -= 1
+                    self.misses += 1
+                    return None
+                self._connection.execute(
+                    "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+                )
+            self.hits += 1
+        return json.loads(payload)
+
+    def set(self, keys, data):
+        """Store a response under one or more keys.
+
+        Args:
+            keys (list): Cache keys, e.g. from title_key and imdb_key.
+            data (dict): The OMDb response.
+        """
+        now = time.time()
+        ttl = self.negative_ttl if data.get('Response') == 'False' else self.ttl
+        payload = json.dumps(data)
+        with self._lock, self._connection:
+            for key in keys:
+                exists = self._connection.execute(
+                    "SELECT 1 FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                    (key, payload, now + ttl, now)
+                )
+                if not exists:
+                    self._size += 1
+            if self._size > self.max_entries:
+                excess = self._size - self.max_entries
+                self._connection.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed LIMIT ?)", (excess,)
+                )
+                self._size -= excess
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+            self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def close(self):
+        """Close the database connection."""
+        self._connection.close()
@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from omdb_cache import title_key, imdb_key
+
+# Default OMDb endpoint; set OMDB_API_URL to point at a local stub server
+API_URL = "http://www.omdbapi.com/"
+
+# HTTP status codes worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class OmdbClient:
+    """Client for the OMDb API with a shared keep-alive session.
+
+    All requests go through one pooled ``requests.Session``. A simple
+    rate limiter spaces requests out across threads, and transient failures
+    are retried with exponential backoff.
+    """
+
+    def __init__(self, api_key, api_url=None, max_workers=8, rate_limit=10.0,
+                 retries=3, backoff=0.5, timeout=10, cache=None):
+        """Initialize the client.
+
+        Args:
+            api_key (str): The OMDb API key.
+            api_url (str): The OMDb endpoint. Defaults to OMDB_API_URL or API_URL.
+            max_workers (int): Number of concurrent requests in fetch_many.
+            rate_limit (float): Maximum requests per second, or 0 for no limit.
+            retries (int): How many times to retry a failed request.
+            backoff (float): Base delay in seconds between retries.
+            timeout (float): Timeout in seconds for each request.
+            cache (OmdbCache): Optional response cache consulted before the API.
+        """
+        self.api_key = api_key
+        self.api_url = api_url or os.getenv("OMDB_API_URL", API_URL)
+        self.max_workers = max_workers
+        self.rate_limit = rate_limit
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache = cache
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def _wait_for_slot(self):
+        """Block until the rate limit allows another request."""
+        if not self.rate_limit:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1 / self.rate_limit
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _get(self, params):
+        """Send a GET request to the API, retrying transient failures."""
+        params = dict(params, apikey=self.api_key)
+        for attempt in range(self.retries + 1):
+            self._wait_for_slot()
+            try:
+                response = self.session.get(self.api_url, params=params, timeout=self.timeout)
+                if response.status_code in RETRY_STATUSES:
+                    raise requests.exceptions.HTTPError(
+                        f"{response.status_code} Error for url: {response.url}", response=response
+                    )
+                response.raise_for_status()
+                return response.json()
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout,
+                    requests.exceptions.HTTPError) as e:
+                response = getattr(e, 'response', None)
+                retryable = response is None or response.status_code in RETRY_STATUSES
+                if attempt == self.retries or not retryable:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def _fetch_cached(self, key, params):
+        """Return the response for a lookup, using the cache when possible."""
+        if self.cache is not None:
+            data = self.cache.get(key)
+            if data is not None:
+                return data
+        data = self._get(params)
+        if self.cache is not None:
+            keys = [key]
+            if data.get('imdbID'):
+                keys.append(imdb_key(data['imdbID']))
+            self.cache.set(keys, data)
+        return data
+
+    def fetch(self, title):
+        """Fetch a movie by title.
+
+        Returns:
+            dict: The OMDb response, or None if the movie was not found.
+
+        Raises:
+            requests.exceptions.RequestException: If the API could not be reached.
+        """
+        data = self._fetch_cached(title_key(title), {'t': title})
+        if data.get('Response') == 'False':
+            return None
+        return data
+
+    def fetch_by_id(self, imdb_id):
+        """Fetch a movie by its imdbID.
+
+        Returns:
+            dict: The OMDb response, or None if the movie was not found.
+        """
+        data = self._fetch_cached(imdb_key(imdb_id), {'i': imdb_id})
+        if data.get('Response') == 'False':
+            return None
+        return data
+
+    def fetch_many(self, titles):
+        """Fetch many titles concurrently.
+
+        Returns:
+            list: (title, data, error) tuples in input order. ``data`` is None
+            if the movie was not found or the request failed; ``error`` holds
+            the exception in the latter case.
+        """
+        def fetch_one(title):
+            try:
+                return title, self.fetch(title), None
+            except requests.exceptions.RequestException as e:
+                return title, None, e
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(fetch_one, titles))
+
+    def close(self):
+        """Close the underlying session."""
+        self.session.close()
+
+
+def movie_from_omdb(data):
+    """Extract (title, year, rating, poster) from an OMDb response."""
+    rating = data.get('imdbRating')
+    # Check if rating is valid and convert to float
+    if rating and rating != "N/A":
+        rating = float(rating)
+    else:
+        rating = None
+    return data.get('Title'), data.get('Year'), rating, data.get('Poster')
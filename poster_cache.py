@@ -0,0 +1,187 @@
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it the originals are used as thumbnails
+    Image = None
+
+# Default directory for downloaded posters and thumbnails
+POSTER_DIR = "static/posters"
+
+# Width and height of generated thumbnails
+THUMBNAIL_SIZE = (200, 300)
+
+# Seconds before a poster that failed to download is tried again
+RETRY_AFTER = 24 * 3600
+
+
+class PosterCache:
+    """Local, content-addressed store of movie posters.
+
+    Each poster URL is downloaded once. The original is stored under its
+    SHA-256 digest and a fixed-size JPEG thumbnail is generated next to it.
+    A manifest maps poster URLs to thumbnails, so later site builds do no
+    network I/O for posters that are already stored. It also records when
+    a download failed, and that URL is not tried again until
+    ``retry_after`` seconds have passed.
+    """
+
+    def __init__(self, directory=POSTER_DIR, thumbnail_size=THUMBNAIL_SIZE, max_workers=8,
+                 timeout=10, retry_after=RETRY_AFTER):
+        self.directory = directory
+        self.thumbnail_size = thumbnail_size
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.manifest_file = os.path.join(directory, 'manifest.json')
+        os.makedirs(os.path.join(directory, 'originals'), exist_ok=True)
+        os.makedirs(os.path.join(directory, 'thumbs'), exist_ok=True)
+
+        try:
+            with open(self.manifest_file, 'r') as file:
+                manifest = json.load(file)
+        except (FileNotFoundError, ValueError):
+            manifest = {}
+        if 'posters' not in manifest:
+            manifest = {'posters': manifest, 'failed': {}}  # Manifests before failures were kept
+        self._manifest = manifest['posters']
+        self._failed = manifest['failed']
+
+        self._lock = threading.Lock()
+        self._session = None
+
+    def _get_session(self):
+        """Return the pooled session, creating it on first use."""
+        if self._session is None:
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers)
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
+        return self._session
+
+    def _is_stored(self, url):
+        """Return True if the thumbnail for a URL is already on disk."""
+        thumbnail = self._manifest.get(url)
+        return thumbnail is not None and os.path.exists(os.path.join(self.directory, thumbnail))
+
+    def _recently_failed(self, url):
+        """Return True if downloading a URL failed less than retry_after seconds ago."""
+        failed_at = self._failed.get(url)
+        return failed_at is not None and time.time() - failed_at < self.retry_after
+
+    def _store(self, url):
+        """Download one poster and store it with its thumbnail.
+
+        Returns:
+            str: The thumbnail path relative to the poster directory, or None
+            if the poster could not be downloaded.
+        """
+        try:
+            response = self._get_session().get(url, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.exceptions.RequestException:
+            return None
+
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        extension = os.path.splitext(urlparse(url).path)[1].lower() or '.jpg'
+        original = os.path.join('originals', digest + extension)
+        original_path = os.path.join(self.directory, original)
+        if not os.path.exists(original_path):
+            with open(original_path, 'wb') as file:
+                file.write(content)
+
+        if Image is None:
+            return original
+
+        thumbnail = os.path.join('thumbs', digest + '.jpg')
+        thumbnail_path = os.path.join(self.directory, thumbnail)
+        if not os.path.exists(thumbnail_path):
+            try:
+                with Image.open(io.BytesIO(content)) as image:
+                    image = image.convert('RGB')
+                    image.thumbnail(self.thumbnail_size)
+                    image.save(thumbnail_path, 'JPEG', quality=85)
+            except OSError:
+                return original
+        return thumbnail
+
+    def fetch_all(self, urls):
+        """Download every poster that is not stored yet, concurrently.
+
+        Posters whose download failed less than retry_after seconds ago are
+        skipped; their remote URL is used instead.
+
+        Args:
+            urls: An iterable of poster URLs; empty and 'N/A' values are skipped.
+
+        Returns:
+            int: The number of posters downloaded.
+        """
+        missing = {
+            url for url in urls
+            if url and url != 'N/A' and not self._is_stored(url) and not self._recently_failed(url)
+        }
+        if not missing:
+            return 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(lambda url: (url, self._store(url)), missing))
+
+        downloaded = 0
+        with self._lock:
+            now = time.time()
+            for url, thumbnail in results:
+                if thumbnail is not None:
+                    self._manifest[url] = thumbnail
+                    self._failed.pop(url, None)
+                    downloaded += 1
+                else:
+                    self._failed[url] = now
+            with open(self.manifest_file, 'w') as file:
+                json.dump({'posters': self._manifest, 'failed': self._failed}, file)
+        if downloaded < len(missing):
+            print(f"Error: Could not download {len(missing) - downloaded} posters; "
+                  f"using their remote URLs and retrying them in "
+                  f"{self.retry_after / 3600:g} hours.")
+        return downloaded
+
+    def local_path(self, url, output_dir='.'):
+        """Return the thumbnail path for a URL relative to output_dir, or None."""
+        thumbnail = self._manifest.get(url)
+        if thumbnail is None:
+            return None
+        path = os.path.relpath(os.path.join(self.directory, thumbnail), output_dir)
+        return path.replace(os.sep, '/')
+
+    def localize(self, movies, output_dir='.'):
+        """Yield (title, details) pairs with posters pointing at local thumbnails.
+
+        Posters that are not stored locally keep their remote URL.
+
+        Args:
+            movies: A dictionary of movies or an iterable of (title, details) pairs.
+            output_dir (str): Directory of the page that will reference the posters.
+        """
+        if isinstance(movies, Mapping):
+            movies = movies.items()
+        for title, details in movies:
+            local = self.local_path(details.get('poster'), output_dir)
+            if local is not None:
+                details = dict(details, poster=local)
+            yield title, details
+
+    def close(self):
+        """Close the download session."""
+        if self._session is not None:
+            self._session.close()
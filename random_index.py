@@ -0,0 +1,138 @@
+import random
+from collections.abc import Mapping
+from storage.normalize import year_range
+
+# Upper bound of the rating scale, used for rating-weighted picks
+MAX_RATING = 10.0
+
+
+class RandomIndex:
+    """Dense arrays of movies for constant-time random selection.
+
+    Titles, ratings and start years are kept in parallel lists with a
+    title -> position map. Deleting swaps the last entry into the freed
+    slot, so the lists stay dense and a uniform pick is one random index.
+    Weighted and filtered picks use rejection sampling and fall back to a
+    scan only when matches are too rare to hit by chance.
+    """
+
+    def __init__(self, max_attempts=64, rng=None):
+        self.max_attempts = max_attempts
+        self._random = rng or random.Random()
+        self._titles = []
+        self._ratings = []
+        self._years = []
+        self._positions = {}
+
+    def __len__(self):
+        return len(self._titles)
+
+    def rebuild(self, movies):
+        """Index every movie from scratch.
+
+        Args:
+            movies: A dictionary of movies or an iterable of (title, details) pairs.
+        """
+        self._titles = []
+        self._ratings = []
+        self._years = []
+        self._positions = {}
+        if isinstance(movies, Mapping):
+            movies = movies.items()
+        for title, details in movies:
+            self.add(title, details)
+
+    def add(self, title, details):
+        """Append a movie to the arrays."""
+        if title in self._positions:
+            return
+        self._positions[title] = len(self._titles)
+        self._titles.append(title)
+        self._ratings.append(details.get('rating'))
+        self._years.append(year_range(details.get('year'))[0])
+
+    def remove(self, title):
+        """Remove a movie by moving the last entry into its slot."""
+        position = self._positions.pop(title, None)
+        if position is None:
+            return
+        last = len(self._titles) - 1
+        if position != last:
+            moved = self._titles[last]
+            self._titles[position] = moved
+            self._ratings[position] = self._ratings[last]
+            self._years[position] = self._years[last]
+            self._positions[moved] = position
+        self._titles.pop()
+        self._ratings.pop()
+        self._years.pop()
+
+    def update(self, title, rating):
+        """Change the rating stored for a movie."""
+        position = self._positions.get(title)
+        if position is not None:
+            self._ratings[position] = rating
+
+    def _matches(self, position, min_rating, start_year, end_year):
+        """Return True if the movie at a position passes the filters."""
+        rating = self._ratings[position]
+        year = self._years[position]
+        if min_rating is not None and (rating is None or rating < min_rating):
+            return False
+        if start_year is not None and (year is None or year < start_year):
+            return False
+        if end_year is not None and (year is None or year > end_year):
+            return False
+        return True
+
+    def pick(self, min_rating=None, start_year=None, end_year=None):
+        """Return a uniformly random title, optionally filtered by rating and start year.
+
+        Returns:
+            str: The title, or None if no movie passes the filters.
+        """
+        if not self._titles:
+            return None
+        randrange = self._random.randrange
+        count = len(self._titles)
+        if min_rating is None and start_year is None and end_year is None:
+            return self._titles[randrange(count)]
+
+        for _ in range(self.max_attempts):
+            position = randrange(count)
+            if self._matches(position, min_rating, start_year, end_year):
+                return self._titles[position]
+
+        # Matches are rare; choose among them directly
+        matches = [position for position in range(count)
+                   if self._matches(position, min_rating, start_year, end_year)]
+        return self._titles[self._random.choice(matches)] if matches else None
+
+    def pick_weighted(self):
+        """Return a random title with probability proportional to its rating.
+
+        Returns:
+            str: The title, or None if no movie has a rating.
+        """
+        if not self._titles:
+            return None
+        randrange = self._random.randrange
+        uniform = self._random.random
+        count = len(self._titles)
+        for _ in range(self.max_attempts):
+            position = randrange(count)
+            rating = self._ratings[position]
+            if rating is not None and uniform() * MAX_RATING < rating:
+                return self._titles[position]
+
+        rated = [(title, rating) for title, rating in zip(self._titles, self._ratings)
+                 if rating]
+        if not rated:
+            return None
+        titles, weights = zip(*rated)
+        return self._random.choices(titles, weights=weights)[0]
+
+    def sample(self, k):
+        """Return k distinct random titles, or every title if there are fewer."""
+        k = min(k, len(self._titles))
+        return [self._titles[position] for position in self._random.sample(range(len(self._titles)), k)]
@@ -0,0 +1,158 @@
+import bisect
+from collections.abc import Mapping
+from storage.normalize import year_range
+
+
+class RatingStatistics:
+    """Rating statistics maintained incrementally as movies change.
+
+    Keeps the count and sum of ratings, a sorted list of (rating, title)
+    pairs for the median, percentiles and best/worst movies, a histogram of
+    whole-number rating buckets and per-year count and sum. Adding, updating
+    or deleting a movie costs O(log N) comparisons instead of a full pass.
+    Unrated movies are remembered with their year only, so that rating
+    them later adds them to the statistics.
+    """
+
+    def __init__(self):
+        self._movies = {}
+        self._sorted = []
+        self._sum = 0.0
+        self._histogram = {}
+        self._years = {}
+
+    def rebuild(self, movies):
+        """Recompute every statistic from scratch.
+
+        Args:
+            movies: A dictionary of movies or an iterable of (title, details) pairs.
+        """
+        self._movies = {}
+        self._sum = 0.0
+        self._histogram = {}
+        self._years = {}
+        if isinstance(movies, Mapping):
+            movies = movies.items()
+        for title, details in movies:
+            if title not in self._movies:
+                self._count(title, details.get('rating'), year_range(details.get('year'))[0])
+        # One sort instead of an insort per movie, which is quadratic
+        self._sorted = sorted(
+            (rating, title) for title, (rating, _) in self._movies.items() if rating is not None
+        )
+
+    def add(self, title, details):
+        """Add a movie's rating to the statistics."""
+        if title in self._movies:
+            return
+        rating = details.get('rating')
+        self._count(title, rating, year_range(details.get('year'))[0])
+        if rating is not None:
+            bisect.insort(self._sorted, (rating, title))
+
+    def _count(self, title, rating, year):
+        """Record a movie and add its rating to every total but the sorted list."""
+        self._movies[title] = (rating, year)
+        if rating is None:
+            return
+        self._sum += rating
+        bucket = min(int(rating), 9)
+        self._histogram[bucket] = self._histogram.get(bucket, 0) + 1
+        if year is not None:
+            count, total = self._years.get(year, (0, 0.0))
+            self._years[year] = (count + 1, total + rating)
+
+    def remove(self, title):
+        """Remove a movie's rating from the statistics."""
+        entry = self._movies.pop(title, None)
+        if entry is None or entry[0] is None:
+            return
+        rating, year = entry
+        del self._sorted[bisect.bisect_left(self._sorted, (rating, title))]
+        self._sum -= rating
+        bucket = min(int(rating), 9)
+        self._histogram[bucket] -= 1
+        if not self._histogram[bucket]:
+            del self._histogram[bucket]
+        if year is not None:
+            count, total = self._years[year]
+            if count == 1:
+                del self._years[year]
+            else:
+                self._years[year] = (count - 1, total - rating)
+
+    def update(self, title, rating):
+        """Change the rating of a movie that is already in the statistics, rated or not."""
+        entry = self._movies.get(title)
+        if entry is None:
+            return
+        self.remove(title)
+        self.add(title, {'rating': rating, 'year': entry[1]})
+
+    @property
+    def count(self):
+        return len(self._sorted)
+
+    @property
+    def average(self):
+        return self._sum / len(self._sorted) if self._sorted else None
+
+    @property
+    def median(self):
+        return self.percentile(50)
+
+    def percentile(self, percent):
+        """Return the rating at the given percentile, interpolating between ratings."""
+        if not self._sorted:
+            return None
+        position = (len(self._sorted) - 1) * percent / 100
+        lower = int(position)
+        upper = min(lower + 1, len(self._sorted) - 1)
+        fraction = position - lower
+        return self._sorted[lower][0] * (1 - fraction) + self._sorted[upper][0] * fraction
+
+    @property
+    def best(self):
+        """Return (title, rating) of the highest rated movie."""
+        if not self._sorted:
+            return None
+        rating, title = self._sorted[-1]
+        return title, rating
+
+    @property
+    def worst(self):
+        """Return (title, rating) of the lowest rated movie."""
+        if not self._sorted:
+            return None
+        rating, title = self._sorted[0]
+        return title, rating
+
+    def histogram(self):
+        """Return {bucket: count} for whole-number rating buckets, in order.
+
+        Bucket ``n`` holds ratings from n up to n + 1; a 10 counts towards 9.
+        """
+        return dict(sorted(self._histogram.items()))
+
+    def by_year(self):
+        """Return {year: (count, average rating)} using each movie's start year."""
+        return {
+            year: (count, total / count)
+            for year, (count, total) in sorted(self._years.items())
+        }
+
+    def summary(self):
+        """Return the headline statistics, or None if there are no rated movies.
+
+        Returns:
+            dict: count, average, median, best and worst as (title, rating).
+        """
+        if not self._sorted:
+            return None
+        return {
+            'count': self.count,
+            'average': self.average,
+            'median': self.median,
+            'best': self.best,
+            'worst': self.worst
+        }
@@ -0,0 +1,263 @@
+import bisect
+import heapq
+import re
+from collections import Counter
+from collections.abc import Mapping
+from itertools import islice, product
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+# Matches the menus list for one search before saying the list was cut short
+DISPLAY_LIMIT = 50
+
+# Most combinations of match levels a search walks before scoring every
+# matching title instead
+MAX_LEVEL_PATTERNS = 64
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens."""
+    return _TOKEN_PATTERN.findall(text.casefold())
+
+
+def trigrams(token):
+    """Return the set of character trigrams of a token, padded at both ends."""
+    padded = f"${token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _rank(title):
+    """Order of titles with the same score: shortest first, then alphabetical."""
+    return len(title), title
+
+
+class SearchIndex:
+    """Inverted token index with trigram-based fuzzy matching.
+
+    Titles are split into tokens, and every token maps to the titles that
+    contain it. Tokens are also indexed by character trigrams so misspelled
+    query words still find close matches, and kept in a sorted vocabulary
+    for prefix autocomplete. The index is updated one title at a time.
+
+    Each token's titles are also kept in ranking order, shortest first, so
+    a search walks the best-scoring titles first and stops after ``limit``
+    instead of scoring every title that contains a common word.
+    """
+
+    def __init__(self, fuzzy_threshold=0.35, max_prefix_tokens=50):
+        self.fuzzy_threshold = fuzzy_threshold
+        self.max_prefix_tokens = max_prefix_tokens
+        self._titles = {}
+        self._postings = {}
+        self._ranked = {}
+        self._trigrams = {}
+        self._vocabulary = []
+
+    def __len__(self):
+        return len(self._titles)
+
+    def rebuild(self, movies):
+        """Index every movie from scratch.
+
+        Args:
+            movies: A dictionary of movies or an iterable of (title, details) pairs.
+        """
+        self._titles = {}
+        self._postings = {}
+        self._trigrams = {}
+        if isinstance(movies, Mapping):
+            movies = movies.items()
+        for title, _ in movies:
+            tokens = set(tokenize(title))
+            self._titles[title] = tokens
+            for token in tokens:
+                self._postings.setdefault(token, set()).add(title)
+        for token in self._postings:
+            for gram in trigrams(token):
+                self._trigrams.setdefault(gram, set()).add(token)
+        self._ranked = {token: sorted(titles, key=_rank) for token, titles in self._postings.items()}
+        self._vocabulary = sorted(self._postings)
+
+    def add(self, title, details=None):
+        """Add a title to the index."""
+        if title in self._titles:
+            return
+        tokens = set(tokenize(title))
+        self._titles[title] = tokens
+        for token in tokens:
+            titles = self._postings.get(token)
+            if titles is None:
+                titles = self._postings[token] = set()
+                self._ranked[token] = []
+                bisect.insort(self._vocabulary, token)
+                for gram in trigrams(token):
+                    self._trigrams.setdefault(gram, set()).add(token)
+            titles.add(title)
+            bisect.insort(self._ranked[token], title, key=_rank)
+
+    def remove(self, title):
+        """Remove a title from the index."""
+        tokens = self._titles.pop(title, None)
+        if tokens is None:
+            return
+        for token in tokens:
+            titles = self._postings[token]
+            titles.discard(title)
+            ranked = self._ranked[token]
+            del ranked[bisect.bisect_left(ranked, _rank(title), key=_rank)]
+            if titles:
+                continue
+            del self._postings[token]
+            del self._ranked[token]
+            del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+            for gram in trigrams(token):
+                grams = self._trigrams[gram]
+                grams.discard(token)
+                if not grams:
+                    del self._trigrams[gram]
+
+    def update(self, title, rating):
+        """Ratings do not affect the search index."""
+
+    def _prefixed(self, prefix):
+        """Return vocabulary tokens that start with the prefix."""
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        tokens = []
+        for token in self._vocabulary[start:start + self.max_prefix_tokens]:
+            if not token.startswith(prefix):
+                break
+            tokens.append(token)
+        return tokens
+
+    def _matches(self, token, prefix):
+        """Return {vocabulary token: weight} for one query token.
+
+        Exact matches weigh 1.0 and prefix matches 0.9. Only when neither
+        exists are trigram-similar tokens considered, weighted by similarity.
+        """
+        matches = {}
+        if token in self._postings:
+            matches[token] = 1.0
+        if prefix:
+            for candidate in self._prefixed(token):
+                matches.setdefault(candidate, 0.9)
+        if matches:
+            return matches
+
+        query_grams = trigrams(token)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self._trigrams.get(gram, ()))
+        for candidate, count in shared.items():
+            similarity = count / (len(query_grams) + len(trigrams(candidate)) - count)
+            if similarity >= self.fuzzy_threshold:
+                matches[candidate] = 0.8 * similarity
+        return matches
+
+    def search(self, query, limit=10):
+        """Return up to ``limit`` titles ranked by how well they match the query.
+
+        Every query word is matched exactly, by prefix (the last word only)
+        or fuzzily. Titles matching more of the words rank higher.
+
+        A title's score only depends on the best match level it reaches for
+        each query word, so the combinations of levels are visited from the
+        highest score down and each one yields its titles in ranking order.
+        The search stops as soon as ``limit`` titles are found.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        # For every query word, its matches grouped by weight, best first
+        levels = []
+        for position, token in enumerate(tokens):
+            by_weight = {}
+            for candidate, weight in self._matches(token, position == len(tokens) - 1).items():
+                by_weight.setdefault(weight, []).append(candidate)
+            levels.append(sorted(by_weight.items(), reverse=True))
+
+        patterns = 1
+        for token_levels in levels:
+            patterns *= len(token_levels) + 1
+        if patterns > MAX_LEVEL_PATTERNS:
+            return self._score_all(levels, limit)
+
+        # A pattern picks a level per query word, or none; summed in query
+        # order like the scores of _score_all, so ties compare the same
+        groups = {}
+        for pattern in product(*(range(len(token_levels) + 1) for token_levels in levels)):
+            score = 0
+            for token_levels, level in zip(levels, pattern):
+                if level < len(token_levels):
+                    score += token_levels[level][0]
+            if score:
+                groups.setdefault(score, []).append(pattern)
+
+        results = []
+        for score in sorted(groups, reverse=True):
+            titles = heapq.merge(*(self._pattern_titles(levels, pattern) for pattern in groups[score]),
+                                 key=_rank)
+            results.extend(islice(titles, limit - len(results)))
+            if len(results) >= limit:
+                break
+        return results
+
+    def _levels_of(self, levels, title):
+        """Return the best match level a title reaches for each query word."""
+        tokens = self._titles[title]
+        return tuple(
+            next((level for level, (_, candidates) in enumerate(token_levels)
+                  if any(candidate in tokens for candidate in candidates)), len(token_levels))
+            for token_levels in levels
+        )
+
+    def _pattern_titles(self, levels, pattern):
+        """Yield, in ranking order, the titles whose match levels are exactly the pattern."""
+        required = [
+            token_levels[level][1] for token_levels, level in zip(levels, pattern)
+            if level < len(token_levels)
+        ]
+        # Walk the fewest titles the pattern requires
+        candidates = min(required, key=lambda group: sum(len(self._postings[c]) for c in group))
+        previous = None
+        for title in heapq.merge(*(self._ranked[c] for c in candidates), key=_rank):
+            if title != previous and self._levels_of(levels, title) == pattern:
+                yield title
+            previous = title
+
+    def _score_all(self, levels, limit):
+        """Score every title matching any query word and return the best ``limit``."""
+        scores = Counter()
+        for token_levels in levels:
+            best = {}
+            for weight, candidates in token_levels:
+                for candidate in candidates:
+                    for title in self._postings[candidate]:
+                        if weight > best.get(title, 0):
+                            best[title] = weight
+            scores.update(best)
+
+        ranked = heapq.nsmallest(limit, scores.items(), key=lambda x: (-x[1], len(x[0]), x[0]))
+        return [title for title, _ in ranked]
+
+    def autocomplete(self, prefix, limit=10):
+        """Return up to ``limit`` titles containing all the typed words.
+
+        The last word may be incomplete and is matched as a prefix.
+        """
+        tokens = tokenize(prefix)
+        if not tokens:
+            return []
+
+        candidates = None
+        for token in tokens[:-1]:
+            titles = self._postings.get(token, set())
+            candidates = titles if candidates is None else candidates & titles
+
+        completions = set()
+        for token in self._prefixed(tokens[-1]):
+            completions.update(self._postings[token])
+        if candidates is not None:
+            completions &= candidates
+        return heapq.nsmallest(limit, completions, key=lambda title: (len(title), title))
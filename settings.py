@@ -0,0 +1,24 @@
+import functools
+import os
+
+
+@functools.lru_cache(maxsize=None)
+def load_environment():
+    """Load the .env file into the environment, once.
+
+    python-dotenv is only imported here, so commands that never read a
+    setting do not pay for it at startup.
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+def getenv(name, default=None):
+    """Return an environment variable, loading the .env file first.
+
+    Args:
+        name (str): The variable name.
+        default: The value returned when the variable is not set.
+    """
+    load_environment()
+    return os.getenv(name, default)
@@ -0,0 +1,149 @@
+import bisect
+from collections.abc import Mapping
+from operator import itemgetter
+from storage.normalize import year_range
+
+_first = itemgetter(0)
+
+
+class SortIndex:
+    """Sorted secondary indexes on rating and release year.
+
+    Keeps (rating, title) and (start year, end year, title) entries in
+    sorted lists that are updated on every change, so sorted listings,
+    top-k queries and rating/year range queries never sort the catalog.
+    Series such as ``2017–2024`` are indexed by their normalized start and
+    end years; movies without a rating or year are left out of that index.
+    """
+
+    def __init__(self):
+        self._movies = {}
+        self._by_rating = []
+        self._by_year = []
+
+    def __len__(self):
+        return len(self._movies)
+
+    def rebuild(self, movies):
+        """Index every movie from scratch.
+
+        Args:
+            movies: A dictionary of movies or an iterable of (title, details) pairs.
+        """
+        if isinstance(movies, Mapping):
+            movies = movies.items()
+        self._movies = {}
+        for title, details in movies:
+            start, end = year_range(details.get('year'))
+            self._movies[title] = (details.get('rating'), start, end)
+        self._by_rating = sorted(
+            (rating, title) for title, (rating, _, _) in self._movies.items() if rating is not None
+        )
+        self._by_year = sorted(
+            (start, end, title) for title, (_, start, end) in self._movies.items() if start is not None
+        )
+
+    def add(self, title, details):
+        """Add a movie to the indexes."""
+        if title in self._movies:
+            return
+        rating = details.get('rating')
+        start, end = year_range(details.get('year'))
+        self._movies[title] = (rating, start, end)
+        if rating is not None:
+            bisect.insort(self._by_rating, (rating, title))
+        if start is not None:
+            bisect.insort(self._by_year, (start, end, title))
+
+    def remove(self, title):
+        """Remove a movie from the indexes."""
+        entry = self._movies.pop(title, None)
+        if entry is None:
+            return
+        rating, start, end = entry
+        if rating is not None:
+            del self._by_rating[bisect.bisect_left(self._by_rating, (rating, title))]
+        if start is not None:
+            del self._by_year[bisect.bisect_left(self._by_year, (start, end, title))]
+
+    def update(self, title, rating):
+        """Move a movie to its new position in the rating index."""
+        entry = self._movies.get(title)
+        if entry is None:
+            return
+        old_rating, start, end = entry
+        if old_rating is not None:
+            del self._by_rating[bisect.bisect_left(self._by_rating, (old_rating, title))]
+        if rating is not None:
+            bisect.insort(self._by_rating, (rating, title))
+        self._movies[title] = (rating, start, end)
+
+    def by_rating(self, reverse=True):
+        """Return all rated titles ordered by rating, highest first by default."""
+        titles = [title for _, title in self._by_rating]
+        return titles[::-1] if reverse else titles
+
+    def by_year(self, reverse=True):
+        """Return all titles with a known year ordered by start year, newest first by default."""
+        titles = [title for _, _, title in self._by_year]
+        return titles[::-1] if reverse else titles
+
+    def top_k(self, k, by='rating'):
+        """Return the k highest titles by rating or by start year, in O(k)."""
+        entries = self._by_rating if by == 'rating' else self._by_year
+        return [entry[-1] for entry in reversed(entries[-k:])] if k > 0 else []
+
+    def bottom_k(self, k, by='rating'):
+        """Return the k lowest titles by rating or by start year, in O(k)."""
+        entries = self._by_rating if by == 'rating' else self._by_year
+        return [entry[-1] for entry in entries[:k]]
+
+    def range_query(self, min_rating=None, max_rating=None, start_year=None, end_year=None,
+                    limit=None):
+        """Return titles within a rating range whose years overlap a year range.
+
+        For example ``range_query(min_rating=8, start_year=1990, end_year=2000)``
+        finds movies rated 8 or more released between 1990 and 2000. Each
+        bound is inclusive and optional. The narrower of the two indexes is
+        scanned and the other condition checked per title. Results are
+        ordered by rating, highest first.
+        """
+        low = 0 if min_rating is None else bisect.bisect_left(self._by_rating, min_rating, key=_first)
+        high = (len(self._by_rating) if max_rating is None
+                else bisect.bisect_right(self._by_rating, max_rating, key=_first))
+
+        if start_year is None and end_year is None:
+            # Only slice the entries that are returned, not the whole rating range
+            entries = self._by_rating[low:high] if limit is None else self._by_rating[max(low, high - limit):high]
+            return [title for _, title in reversed(entries)]
+
+        # A movie overlaps the years if it starts before end_year and ends after start_year
+        year_high = (len(self._by_year) if end_year is None
+                     else bisect.bisect_right(self._by_year, end_year, key=_first))
+
+        if year_high < high - low:
+            matches = [
+                (self._movies[title][0], title)
+                for _, end, title in self._by_year[:year_high]
+                if start_year is None or end >= start_year
+            ]
+            matches = [
+                (rating, title) for rating, title in matches
+                if rating is not None
+                and (min_rating is None or rating >= min_rating)
+                and (max_rating is None or rating <= max_rating)
+            ]
+            matches.sort(reverse=True)
+        else:
+            matches = []
+            for rating, title in reversed(self._by_rating[low:high]):
+                _, start, end = self._movies[title]
+                if start is None:
+                    continue
+                if (end_year is None or start <= end_year) and (start_year is None or end >= start_year):
+                    matches.append((rating, title))
+                    if limit is not None and len(matches) >= limit:
+                        break
+
+        titles = [title for _, title in matches]
+        return titles[:limit] if limit is not None else titles
@@ -0,0 +1,116 @@
+# indexed_storage.py
+import contextlib
+from storage.istorage import IStorage
+
+
+class IndexedStorage(IStorage):
+    """Wrap a storage and keep in-memory indexes in sync with it.
+
+    Every index provides ``rebuild(movies)``, ``add(title, details)``,
+    ``remove(title)`` and ``update(title, rating)``. The indexes are built
+    once from the wrapped storage and then updated on every change made
+    through this wrapper, which is also reported to subscribers together
+    with the version the storage had right before it. Each change holds the
+    wrapped storage's write lock, if it has one, so that version cannot
+    include another process's write. A change reported as 'external', by
+    a StorageWatcher, rebuilds the indexes.
+    """
+
+    def __init__(self, storage, indexes=()):
+        """Initialize the wrapper and build the indexes.
+
+        Args:
+            storage: The storage to wrap.
+            indexes (list): The indexes to maintain.
+        """
+        self._storage = storage
+        self.indexes = list(indexes)
+        self.rebuild()
+
+    def rebuild(self):
+        """Rebuild every index from the wrapped storage."""
+        movies = self._storage.list_movies()
+        for index in self.indexes:
+            index.rebuild(movies)
+
+    def list_movies(self):
+        """List all movies in the wrapped storage."""
+        return self._storage.list_movies()
+
+    def iter_movies(self):
+        """Yield (title, details) pairs from the wrapped storage."""
+        return self._storage.iter_movies()
+
+    def get_movie(self, title):
+        """Return the details of one movie from the wrapped storage, or None."""
+        return self._storage.get_movie(title)
+
+    def version(self):
+        """Return the version token of the wrapped storage."""
+        return self._storage.version()
+
+    def _write_lock(self):
+        """Return the wrapped storage's exclusive lock, or a no-op if it has none."""
+        lock = getattr(self._storage, 'lock', None)
+        return lock.hold(exclusive=True) if lock is not None else contextlib.nullcontext()
+
+    def add_movie(self, title, year, rating, poster):
+        """Add a movie to the wrapped storage and the indexes."""
+        with self._write_lock():
+            previous = self._storage.version()
+            self._storage.add_movie(title, year, rating, poster)
+            details = {'rating': rating, 'year': year, 'poster': poster}
+            for index in self.indexes:
+                index.remove(title)
+                index.add(title, details)
+            self.notify_change('add', (title,), previous)
+
+    def add_movies(self, movies):
+        """Add several movies to the wrapped storage and the indexes."""
+        with self._write_lock():
+            previous = self._storage.version()
+            self._storage.add_movies(movies)
+            for title, details in movies.items():
+                for index in self.indexes:
+                    index.remove(title)
+                    index.add(title, details)
+            self.notify_change('add', movies, previous)
+
+    def delete_movie(self, title):
+        """Delete a movie from the wrapped storage and the indexes."""
+        with self._write_lock():
+            previous = self._storage.version()
+            self._storage.delete_movie(title)
+            for index in self.indexes:
+                index.remove(title)
+            self.notify_change('delete', (title,), previous)
+
+    def update_movie(self, title, rating):
+        """Update a movie's rating in the wrapped storage and the indexes."""
+        with self._write_lock():
+            previous = self._storage.version()
+            self._storage.update_movie(title, rating)
+            for index in self.indexes:
+                index.update(title, rating)
+            self.notify_change('update', (title,), previous)
+
+    def save_movies(self, movies):
+        """Save the movies to the wrapped storage and rebuild the indexes."""
+        with self._write_lock():
+            previous = self._storage.version()
+            self._storage.save_movies(movies)
+            for index in self.indexes:
+                index.rebuild(movies)
+            self.notify_change('save', None, previous)
+
+    def notify_change(self, kind, titles=None, previous_version=None):
+        """Rebuild the indexes if another process changed the storage, then report the change."""
+        if kind == 'external':
+            self.rebuild()
+        super().notify_change(kind, titles, previous_version)
+
+    def __getattr__(self, name):
+        # Expose backend-specific methods such as search_movie on StorageSqlite
+        if name == '_storage':
+            raise AttributeError(name)
+        return getattr(self._storage, name)
@@ -1,9 +1,22 @@
 from abc import ABC, abstractmethod
+from collections import namedtuple
+
+# A change to a storage. kind is 'add', 'delete', 'update', 'save' or
+# 'external' for changes made by another process; titles is a tuple of the
+# affected titles, or None if any movie may have changed; previous_version
+# is the storage's version() right before the change, or None if unknown.
+StorageChange = namedtuple('StorageChange', ['kind', 'titles', 'previous_version'],
+                           defaults=(None,))
 
 
 class IStorage(ABC):
     """
     Abstract base class for movie storage systems.
+
+    Storages have a change feed: subscribe() registers a callback that is
+    called with a StorageChange. The wrappers that see every change,
+    IndexedStorage and SessionStorage, report changes made through them;
+    a StorageWatcher reports changes made by other processes.
     """
 
     @abstractmethod
@@ -13,6 +26,65 @@ class IStorage(ABC):
         """
         pass
 
+    def iter_movies(self):
+        """
+        Yield (title, details) pairs one movie at a time.
+
+        Backends that can stream their rows override this so callers do not
+        need the whole catalog in memory.
+        """
+        yield from self.list_movies().items()
+
+    def get_movie(self, title):
+        """
+        Return the details of one movie, or None if there is no such title.
+
+        Backends that can look up a title without reading every movie
+        override this.
+        """
+        return next((details for movie_title, details in self.iter_movies()
+                     if movie_title == title), None)
+
+    def version(self):
+        """
+        Return a token that changes whenever the stored movies change.
+
+        Callers compare tokens to tell whether cached data is stale. None
+        means the backend cannot tell, so callers must not rely on it.
+        """
+        return None
+
+    def subscribe(self, callback):
+        """
+        Call callback(change) with a StorageChange after every change.
+
+        Args:
+            callback: A function taking a StorageChange.
+        """
+        # Kept in __dict__ so subclasses need not call IStorage.__init__
+        self.__dict__.setdefault('_subscribers', []).append(callback)
+
+    def unsubscribe(self, callback):
+        """
+        Stop calling a callback registered with subscribe().
+        """
+        subscribers = self.__dict__.get('_subscribers', [])
+        if callback in subscribers:
+            subscribers.remove(callback)
+
+    def notify_change(self, kind, titles=None, previous_version=None):
+        """
+        Report a change to every subscriber.
+
+        Args:
+            kind (str): 'add', 'delete', 'update', 'save' or 'external'.
+            titles: The affected titles, or None if any movie may have changed.
+            previous_version: The version() right before the change, if known.
+        """
+        change = StorageChange(kind, None if titles is None else tuple(titles), previous_version)
+        for callback in list(self.__dict__.get('_subscribers', ())):
+            callback(change)
+
     @abstractmethod
     def save_movies(self, movies):
         """
@@ -0,0 +1,95 @@
+# locking.py
+import contextlib
+import os
+import stat
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Advisory locks are only available on Unix; elsewhere locking is a no-op
+    fcntl = None
+
+
+class StorageConflictError(Exception):
+    """Raised when a file changed since it was read and a write would clobber it."""
+
+
+class FileLock:
+    """Re-entrant advisory lock built on ``fcntl.flock``.
+
+    Readers hold a shared lock and writers an exclusive one. The lock lives
+    in a separate ``.lock`` file, because writes replace the data file and
+    a lock on the old file would not protect the new one. Nested use from
+    the same object is allowed, and an exclusive request inside a shared one
+    upgrades the lock for its duration. Not meant to be shared between threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._depth = 0
+        self._exclusive = False
+
+    @contextlib.contextmanager
+    def hold(self, exclusive=False):
+        """Hold the lock, shared by default or exclusive for writers."""
+        if fcntl is None:
+            yield
+            return
+
+        upgraded = False
+        if self._depth == 0:
+            self._file = open(self.path, 'a')
+            fcntl.flock(self._file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._exclusive = exclusive
+        elif exclusive and not self._exclusive:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+            self._exclusive = True
+            upgraded = True
+
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if upgraded:
+                fcntl.flock(self._file, fcntl.LOCK_SH)
+                self._exclusive = False
+            if self._depth == 0:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+                self._file.close()
+                self._file = None
+
+
+def write_atomic(file_path, write, newline=None, binary=False):
+    """Write a file through a temporary file that is renamed over it.
+
+    Readers see either the old or the new file, never a half-written one.
+    The file's permissions are kept.
+
+    Args:
+        file_path (str): The file to replace.
+        write: Called with the open temporary file to write the contents.
+        newline: Passed to open(), e.g. '' for csv writers.
+        binary (bool): Open the temporary file in binary mode.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    suffix = os.path.splitext(file_path)[1]
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix=suffix)
+    try:
+        if binary:
+            file = os.fdopen(descriptor, 'wb')
+        else:
+            file = os.fdopen(descriptor, 'w', encoding='utf-8', newline=newline)
+        with file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+        try:
+            os.chmod(temp_path, stat.S_IMODE(os.stat(file_path).st_mode))
+        except FileNotFoundError:
+            os.chmod(temp_path, 0o644)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
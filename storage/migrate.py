@@ -0,0 +1,232 @@
+# migrate.py
+import argparse
+import json
+import os
+from storage.normalize import normalize_rating, normalize_year
+
+DEFAULT_BATCH_SIZE = 1000
+_CHUNK_SIZE = 1 << 16
+_WHITESPACE = ' \t\n\r'
+
+
+def iter_json_movies(file_path, chunk_size=_CHUNK_SIZE):
+    """Yield (title, details) pairs from a data.json style file without loading it.
+
+    The file is one JSON object mapping titles to details. It is read in
+    chunks and decoded one entry at a time, so memory use does not grow
+    with the file.
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r', encoding='utf-8') as file:
+        buffer = ''
+        position = 0
+        eof = False
+
+        def fill():
+            nonlocal buffer, position, eof
+            chunk = file.read(chunk_size)
+            if not chunk:
+                eof = True
+            buffer = buffer[position:] + chunk
+            position = 0
+
+        def skip_whitespace():
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in _WHITESPACE:
+                    position += 1
+                if position < len(buffer) or eof:
+                    return
+                fill()
+
+        def expect(characters):
+            nonlocal position
+            skip_whitespace()
+            if position == len(buffer) or buffer[position] not in characters:
+                raise ValueError(f"Malformed JSON in '{file_path}': expected {characters!r}.")
+            position += 1
+            return buffer[position - 1]
+
+        def decode():
+            nonlocal position
+            skip_whitespace()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                    # A number at the end of the buffer may continue in the next chunk
+                    if end < len(buffer) or eof:
+                        position = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill()
+
+        expect('{')
+        skip_whitespace()
+        if position < len(buffer) and buffer[position] == '}':
+            return
+        while True:
+            title = decode()
+            expect(':')
+            yield title, decode()
+            if expect(',}') == '}':
+                return
+
+
+class _JsonWriter:
+    """Write movies to a data.json style file one entry at a time.
+
+    The output matches StorageJson's indented format.
+    """
+
+    def __init__(self, file_path):
+        self._file = open(file_path, 'w', encoding='utf-8')
+        self._file.write('{')
+        self._first = True
+
+    def add_movies(self, movies):
+        for title, details in movies.items():
+            entry = json.dumps({title: details}, indent=4)[2:-2]
+            self._file.write('\n' if self._first else ',\n')
+            self._file.write(entry)
+            self._first = False
+
+    def close(self):
+        self._file.write('}' if self._first else '\n}')
+        self._file.close()
+
+
+def open_storage(file_path):
+    """Return the storage for a file, chosen by its extension.
+
+    Supports .csv (StorageCsv), .jsonl (StorageJsonl) and .sqlite or .db
+    (StorageSqlite).
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.csv':
+        from storage.storage_csv import StorageCsv
+        return StorageCsv(file_path)
+    if extension == '.jsonl':
+        from storage.storage_jsonl import StorageJsonl
+        return StorageJsonl(file_path)
+    if extension in ('.sqlite', '.db'):
+        from storage.storage_sqlite import StorageSqlite
+        return StorageSqlite(file_path)
+    raise ValueError(f"Unsupported storage file '{file_path}'.")
+
+
+def iter_source(file_path):
+    """Yield (title, details) pairs from a storage file in any supported format."""
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Source '{file_path}' not found.")
+    if file_path.lower().endswith('.json'):
+        return iter_json_movies(file_path)
+    return open_storage(file_path).iter_movies()
+
+
+def normalize_movie(title, details):
+    """Return a (title, details) pair in the common schema, or None to skip it.
+
+    Titles are stripped, years and ratings normalized, and a missing
+    poster becomes an empty string. A missing or invalid rating becomes
+    None, which every storage can hold; only movies without a title are
+    skipped. Extra fields such as plot are kept for formats that can store
+    them.
+    """
+    title = str(title).strip()
+    if not title or not isinstance(details, dict):
+        return None
+    normalized = dict(details)
+    normalized['rating'] = normalize_rating(details.get('rating'))
+    normalized['year'] = normalize_year(details.get('year'))
+    normalized['poster'] = details.get('poster') or ''
+    return title, normalized
+
+
+def _discard(file_path):
+    """Remove a partly written file and the lock file storages keep beside it."""
+    for path in (file_path, file_path + '.lock'):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def migrate(sources, target, batch_size=DEFAULT_BATCH_SIZE):
+    """Stream the movies of one or more storage files into a new storage file.
+
+    Rows are normalized and written in batches through the target's
+    add_movies. When titles repeat, ignoring case, the first one read
+    wins, so list the preferred source first. Only the set of titles is
+    kept in memory. The target is written to a temporary file next to it
+    and renamed into place at the end, so a failed run leaves the old
+    target untouched.
+
+    Args:
+        sources (list): Paths of .csv, .json, .jsonl, .sqlite or .db files.
+        target (str): Path of the file to create, in any of those formats.
+        batch_size (int): Movies per write.
+
+    Returns:
+        dict: Counts of movies read, written, skipped as invalid and
+        dropped as duplicates.
+    """
+    directory, name = os.path.split(os.path.abspath(target))
+    temp_path = os.path.join(directory, '.tmp-' + name)
+    _discard(temp_path)
+    if target.lower().endswith('.json'):
+        writer = _JsonWriter(temp_path)
+    else:
+        writer = open_storage(temp_path)
+
+    counts = {'read': 0, 'written': 0, 'skipped': 0, 'duplicates': 0}
+    seen = set()
+    batch = {}
+    try:
+        for source in sources:
+            for title, details in iter_source(source):
+                counts['read'] += 1
+                movie = normalize_movie(title, details)
+                if movie is None:
+                    counts['skipped'] += 1
+                    continue
+                title, details = movie
+                key = title.casefold()
+                if key in seen:
+                    counts['duplicates'] += 1
+                    continue
+                seen.add(key)
+                batch[title] = details
+                if len(batch) >= batch_size:
+                    writer.add_movies(batch)
+                    counts['written'] += len(batch)
+                    batch = {}
+        if batch:
+            writer.add_movies(batch)
+            counts['written'] += len(batch)
+        if hasattr(writer, 'close'):
+            writer.close()
+        if not os.path.exists(temp_path):
+            open(temp_path, 'w').close()  # No movies were written
+        os.replace(temp_path, target)
+    finally:
+        _discard(temp_path)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Merge movie storages into a new one, streaming and normalizing the rows."
+    )
+    parser.add_argument('sources', nargs='+', help="Files to read, preferred first")
+    parser.add_argument('--to', required=True, dest='target', help="File to create")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    counts = migrate(args.sources, args.target, args.batch_size)
+    print(f"Migrated {counts['written']} of {counts['read']} movies to '{args.target}' "
+          f"({counts['duplicates']} duplicates, {counts['skipped']} invalid).")
+
+
+if __name__ == "__main__":
+    # python -m storage.migrate data/storage.csv data/data.json --to data/movies.jsonl
+    main()
@@ -0,0 +1,70 @@
+# normalize.py
+import re
+
+_YEAR_PATTERN = re.compile(r'\d{4}')
+
+
+def year_range(year):
+    """Return the (start, end) years for a year value.
+
+    OMDb reports series as ranges such as ``2017–2024`` or ``2017–``.
+    Plain years give the same start and end; unknown values give
+    ``(None, None)``.
+
+    Args:
+        year: The year as an int or a string.
+    """
+    if isinstance(year, int):
+        return year, year
+    years = _YEAR_PATTERN.findall(str(year or ''))
+    if not years:
+        return None, None
+    return int(years[0]), int(years[-1])
+
+
+def parse_year(value):
+    """Return the year as an int when possible, otherwise the raw string."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def parse_rating(value):
+    """Return the rating as a float, or None if it is missing or invalid."""
+    if value in (None, '', 'N/A'):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_year(value):
+    """Return a year in the form the storages write.
+
+    Plain years become ints, ranges become ``2017–2024`` or ``2017–`` with
+    an en dash whatever separator they used, and missing or unparseable
+    values become None.
+    """
+    if isinstance(value, int):
+        return value
+    text = str(value or '').strip()
+    years = _YEAR_PATTERN.findall(text)
+    if not years:
+        return None
+    if len(years) > 1:
+        return f"{years[0]}–{years[-1]}"
+    if text == years[0]:
+        return int(years[0])
+    if text.startswith(years[0]) and text[4:].strip() in ('-', '–'):
+        return f"{years[0]}–"
+    return int(years[0])
+
+
+def normalize_rating(value, maximum=10.0):
+    """Return the rating as a float between 0 and maximum, or None."""
+    rating = parse_rating(value)
+    if rating is None or not 0 <= rating <= maximum:
+        return None
+    return rating
@@ -0,0 +1,119 @@
+# session_storage.py
+import inspect
+from storage.istorage import IStorage
+from storage.locking import StorageConflictError
+
+
+class SessionStorage(IStorage):
+    """Apply many changes to a storage with one load and one save.
+
+    The wrapped storage is read on first use. Adds, updates and deletes
+    change the movies in memory only, and flush() writes them back with
+    a single save_movies call. If the wrapped storage reports a version
+    and it changed since the movies were loaded, flush() raises
+    StorageConflictError instead of overwriting the other changes. Storages
+    whose save_movies takes an expected_version check it under their write
+    lock; for the others the version is compared just before saving.
+    Every change in memory is reported to subscribers as it is made.
+    """
+
+    def __init__(self, storage):
+        """Initialize the session.
+
+        Args:
+            storage: The storage to load from and flush to.
+        """
+        self._storage = storage
+        self._movies = None
+        self._version = None
+        self.changes = 0
+
+    def _loaded(self):
+        """Load the movies from the wrapped storage on first use."""
+        if self._movies is None:
+            self._version = self._storage.version()
+            self._movies = self._storage.list_movies()
+        return self._movies
+
+    def list_movies(self):
+        """Return the session's movies; changes to them are flushed too."""
+        return self._loaded()
+
+    def iter_movies(self):
+        """Yield the session's movies as (title, details) pairs."""
+        yield from self._loaded().items()
+
+    def get_movie(self, title):
+        """Return the session's details of one movie, or None."""
+        return self._loaded().get(title)
+
+    def version(self):
+        """Return a token that changes with every change made in the session."""
+        return self._version, self.changes
+
+    def add_movie(self, title, year, rating, poster):
+        """Add or replace a movie in memory."""
+        self._loaded()[title] = {'rating': rating, 'year': year, 'poster': poster}
+        previous = self.version()
+        self.changes += 1
+        self.notify_change('add', (title,), previous)
+
+    def add_movies(self, movies):
+        """Add or replace several movies in memory."""
+        self._loaded().update(movies)
+        previous = self.version()
+        self.changes += len(movies)
+        self.notify_change('add', movies, previous)
+
+    def delete_movie(self, title):
+        """Delete a movie in memory."""
+        movies = self._loaded()
+        if title in movies:
+            del movies[title]
+            previous = self.version()
+            self.changes += 1
+            self.notify_change('delete', (title,), previous)
+            print(f"Movie '{title}' deleted successfully.")
+        else:
+            print(f"Movie '{title}' not found.")
+
+    def update_movie(self, title, rating):
+        """Update a movie's rating in memory."""
+        movies = self._loaded()
+        if title in movies:
+            movies[title]['rating'] = rating
+            previous = self.version()
+            self.changes += 1
+            self.notify_change('update', (title,), previous)
+            print(f"Movie '{title}' updated successfully.")
+        else:
+            print(f"Movie '{title}' not found.")
+
+    def save_movies(self, movies):
+        """Replace the session's movies; they are written on flush()."""
+        self._movies = movies
+        previous = self.version()
+        self.changes += 1
+        self.notify_change('save', None, previous)
+
+    def flush(self):
+        """Save the movies to the wrapped storage if anything changed.
+
+        Returns:
+            bool: True if the wrapped storage was written.
+        """
+        if not self.changes:
+            return False
+        conflict = "The storage changed since the session loaded it."
+        if 'expected_version' in inspect.signature(self._storage.save_movies).parameters:
+            try:
+                self._storage.save_movies(self._movies, expected_version=self._version)
+            except StorageConflictError as e:
+                raise StorageConflictError(conflict) from e
+        else:
+            if self._version is not None and self._storage.version() != self._version:
+                raise StorageConflictError(conflict)
+            self._storage.save_movies(self._movies)
+        self._version = self._storage.version()
+        self.changes = 0
+        return True
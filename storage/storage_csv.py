@@ -1,17 +1,48 @@
 # storage_csv.py
 import csv
+import os
 from storage.istorage import IStorage
+from storage.locking import FileLock, StorageConflictError, write_atomic
+from storage.normalize import parse_rating
+from movie_catalog import MovieCatalog
 
 
 class StorageCsv(IStorage):
-    def __init__(self, file_path):
+    def __init__(self, file_path, compact=False):
+        """Initialize the storage.
+
+        Args:
+            file_path (str): Path of the CSV file.
+            compact (bool): Return movies as a memory-efficient MovieCatalog
+                instead of a dictionary of dictionaries.
+        """
         self.file_path = file_path
+        self.compact_movies = compact
+        self.lock = FileLock(file_path + '.lock')
+
+    def version(self):
+        """Return a token that changes whenever the file is rewritten or appended to.
+
+        Pass it to save_movies as expected_version to detect concurrent writes.
+        """
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _new_movies(self, rows):
+        """Collect (title, details) pairs into a dictionary or a MovieCatalog."""
+        return MovieCatalog.from_rows(rows) if self.compact_movies else dict(rows)
 
     def list_movies(self):
         """Read movies from the CSV file and return a dictionary of dictionaries."""
-        movies = {}
+        return self._new_movies(self.iter_movies())
+
+    def iter_movies(self):
+        """Read movies from the CSV file one row at a time as (title, details) pairs."""
         try:
-            with open(self.file_path, mode='r') as file:
+            with self.lock.hold(), open(self.file_path, mode='r') as file:
                 reader = csv.DictReader(file)
                 for row in reader:
                     title = row['title']
@@ -20,18 +51,17 @@ class StorageCsv(IStorage):
                     except ValueError:
                         year = row['year']
 
-                    movies[title] = {
-                        'rating': float(row['rating']),
+                    yield title, {
+                        'rating': parse_rating(row['rating']),
                         'year': year,
                         'poster': row['poster']
                     }
         except FileNotFoundError:
             print("File not found. Returning an empty list of movies.")
-        return movies
 
     def add_movie(self, title, year, rating, poster):
         """Add a new movie to the CSV file."""
-        with open(self.file_path, mode='a', newline='') as file:
+        with self.lock.hold(exclusive=True), open(self.file_path, mode='a', newline='') as file:
             writer = csv.DictWriter(file, fieldnames=['title', 'year', 'rating', 'poster'])
             if file.tell() == 0:  # Check if file is empty, to write headers
                 writer.writeheader()
@@ -42,29 +72,57 @@ class StorageCsv(IStorage):
                 'poster': poster
             })
 
+    def add_movies(self, movies):
+        """Append several movies to the CSV file in a single write.
+
+        Args:
+            movies (dict): The dictionary of movies to add.
+        """
+        with self.lock.hold(exclusive=True), open(self.file_path, mode='a', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=['title', 'year', 'rating', 'poster'])
+            if file.tell() == 0:  # Check if file is empty, to write headers
+                writer.writeheader()
+            writer.writerows({
+                'title': movie_title,
+                'year': movie_data['year'],
+                'rating': movie_data['rating'],
+                'poster': movie_data['poster']
+            } for movie_title, movie_data in movies.items())
+
     def delete_movie(self, title):
         """Delete a movie from the CSV file."""
-        movies = self.list_movies()
-        if title in movies:
-            del movies[title]
-            self.save_movies(movies)  # Save updated movies after deletion
-            print(f"Movie '{title}' deleted successfully.")
-        else:
-            print(f"Movie '{title}' not found.")
+        with self.lock.hold(exclusive=True):
+            movies = self.list_movies()
+            if title in movies:
+                del movies[title]
+                self.save_movies(movies)  # Save updated movies after deletion
+                print(f"Movie '{title}' deleted successfully.")
+            else:
+                print(f"Movie '{title}' not found.")
 
     def update_movie(self, title, rating):
         """Update a movie's rating in the CSV file."""
-        movies = self.list_movies()
-        if title in movies:
-            movies[title]['rating'] = rating
-            self.save_movies(movies)  # Save updated movies after update
-            print(f"Movie '{title}' updated successfully.")
-        else:
-            print(f"Movie '{title}' not found.")
-
-    def save_movies(self, movies):
-        """Save the movies back to the CSV file."""
-        with open(self.file_path, mode='w', newline='') as file:
+        with self.lock.hold(exclusive=True):
+            movies = self.list_movies()
+            if title in movies:
+                movies[title]['rating'] = rating
+                self.save_movies(movies)  # Save updated movies after update
+                print(f"Movie '{title}' updated successfully.")
+            else:
+                print(f"Movie '{title}' not found.")
+
+    def save_movies(self, movies, expected_version=None):
+        """Save the movies back to the CSV file.
+
+        The file is replaced atomically under an exclusive lock.
+
+        Args:
+            movies (dict): The dictionary of movies to save.
+            expected_version: The version() the movies were read at. If the
+                file changed since then, StorageConflictError is raised
+                instead of overwriting the other writer's changes.
+        """
+        def write(file):
             writer = csv.DictWriter(file, fieldnames=['title', 'year', 'rating', 'poster'])
             writer.writeheader()
             for movie_title, movie_data in movies.items():
@@ -74,4 +132,9 @@ class StorageCsv(IStorage):
                     'rating': movie_data['rating'],
                     'poster': movie_data['poster']
                 })
+
+        with self.lock.hold(exclusive=True):
+            if expected_version is not None and self.version() != expected_version:
+                raise StorageConflictError(f"'{self.file_path}' changed since it was read.")
+            write_atomic(self.file_path, write, newline='')
         print("Movies saved to the CSV file.")
@@ -0,0 +1,110 @@
+# storage_csv_cached.py
+import os
+from storage.storage_csv import StorageCsv
+
+
+class StorageCsvCached(StorageCsv):
+    """CSV storage that keeps the parsed movies in memory.
+
+    Writes go to both the cache and the file. The file is only parsed
+    again when its modification time or size changes outside this process.
+    """
+
+    def __init__(self, file_path, compact=False):
+        super().__init__(file_path, compact)
+        self._movies = None
+        self._file_signature = None
+
+    def _signature(self):
+        """Return a (mtime, size) tuple for the backing file, or None if missing."""
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        """Parse the backing file into a fresh dictionary of movies."""
+        return self._new_movies(super().iter_movies())
+
+    def _ensure_loaded(self):
+        """Reload the cache if it is empty or the file changed on disk.
+
+        The signature is taken under the same shared lock as the parse, so a
+        write by another process cannot slip in between and be recorded as
+        already loaded.
+        """
+        with self.lock.hold():
+            signature = self._signature()
+            if self._movies is None or signature != self._file_signature:
+                self._movies = self._load()
+                self._file_signature = signature
+        return self._movies
+
+    def invalidate(self):
+        """Drop the cached movies so the next read parses the file again."""
+        self._movies = None
+        self._file_signature = None
+
+    def list_movies(self):
+        """Return the cached movies, reloading them if the file changed.
+
+        In compact mode the cached MovieCatalog itself is returned rather
+        than a copy.
+        """
+        movies = self._ensure_loaded()
+        return movies if self.compact_movies else dict(movies)
+
+    def iter_movies(self):
+        """Yield the cached movies as (title, details) pairs."""
+        yield from self._ensure_loaded().items()
+
+    def get_movie(self, title):
+        """Return the cached details of one movie, or None."""
+        return self._ensure_loaded().get(title)
+
+    def add_movie(self, title, year, rating, poster):
+        """Append a movie to the CSV file and to the cache."""
+        with self.lock.hold(exclusive=True):
+            movies = self._ensure_loaded()
+            super().add_movie(title, year, rating, poster)
+            movies[title] = {'rating': rating, 'year': year, 'poster': poster}
+            self._file_signature = self._signature()
+
+    def add_movies(self, movies):
+        """Append several movies to the CSV file and to the cache."""
+        with self.lock.hold(exclusive=True):
+            cached = self._ensure_loaded()
+            super().add_movies(movies)
+            cached.update(movies)
+            self._file_signature = self._signature()
+
+    def delete_movie(self, title):
+        """Delete a movie from the cache and rewrite the CSV file."""
+        with self.lock.hold(exclusive=True):
+            movies = self._ensure_loaded()
+            if title in movies:
+                del movies[title]
+                self.save_movies(movies)
+                print(f"Movie '{title}' deleted successfully.")
+            else:
+                print(f"Movie '{title}' not found.")
+
+    def update_movie(self, title, rating):
+        """Update a movie's rating in the cache and rewrite the CSV file."""
+        with self.lock.hold(exclusive=True):
+            movies = self._ensure_loaded()
+            if title in movies:
+                movies[title]['rating'] = rating
+                self.save_movies(movies)
+                print(f"Movie '{title}' updated successfully.")
+            else:
+                print(f"Movie '{title}' not found.")
+
+    def save_movies(self, movies, expected_version=None):
+        """Save the movies to the CSV file and make them the new cache."""
+        with self.lock.hold(exclusive=True):
+            super().save_movies(movies, expected_version)
+            if movies is not self._movies:
+                self._movies = self._new_movies(movies.items())
+            self._file_signature = self._signature()
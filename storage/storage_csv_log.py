@@ -0,0 +1,147 @@
+# storage_csv_log.py
+import csv
+import os
+from storage.storage_csv import StorageCsv
+from storage.storage_csv_cached import StorageCsvCached
+from storage.normalize import parse_rating
+
+LOG_FIELDS = ['op', 'title', 'year', 'rating', 'poster']
+
+
+class StorageCsvLog(StorageCsvCached):
+    """CSV storage that records changes in an append-only log.
+
+    Adds, updates and deletes are appended to ``<file_path>.log`` as
+    upsert or delete records instead of rewriting the CSV file. Reads
+    replay the log over the base file. Once the log holds
+    ``compact_threshold`` records it is folded back into the base file.
+    Replaying a log over an already compacted file gives the same result,
+    so a crash during compaction does not lose data.
+    """
+
+    def __init__(self, file_path, compact_threshold=1000, compact=False):
+        super().__init__(file_path, compact)
+        self.log_path = file_path + '.log'
+        self.compact_threshold = compact_threshold
+        self._log_records = 0
+
+    def _signature(self):
+        """Return the signatures of both the base file and the log."""
+        try:
+            stat = os.stat(self.log_path)
+            log_signature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            log_signature = None
+        return super()._signature(), log_signature
+
+    def version(self):
+        """Return a token covering both the base file and the log."""
+        return super().version(), self._signature()[1]
+
+    def _load(self):
+        """Parse the base file and replay the log on top of it."""
+        with self.lock.hold():
+            movies = super()._load()
+            self._log_records = 0
+            try:
+                with open(self.log_path, mode='r', newline='') as file:
+                    reader = csv.DictReader(file, fieldnames=LOG_FIELDS)
+                    for row in reader:
+                        self._log_records += 1
+                        title = row['title']
+                        if row['op'] == 'delete':
+                            movies.pop(title, None)
+                            continue
+                        try:
+                            year = int(row['year'])
+                        except ValueError:
+                            year = row['year']
+                        movies[title] = {
+                            'rating': parse_rating(row['rating']),
+                            'year': year,
+                            'poster': row['poster']
+                        }
+            except FileNotFoundError:
+                pass
+            return movies
+
+    def _append_log(self, records):
+        """Append records to the log and compact once it grows too large."""
+        with self.lock.hold(exclusive=True):
+            with open(self.log_path, mode='a', newline='') as file:
+                writer = csv.DictWriter(file, fieldnames=LOG_FIELDS)
+                writer.writerows(records)
+            self._log_records += len(records)
+            self._file_signature = self._signature()
+            if self._log_records >= self.compact_threshold:
+                self.compact()
+
+    def add_movie(self, title, year, rating, poster):
+        """Record a new movie as an upsert in the log."""
+        with self.lock.hold(exclusive=True):
+            movies = self._ensure_loaded()
+            movies[title] = {'rating': rating, 'year': year, 'poster': poster}
+            self._append_log([{
+                'op': 'upsert',
+                'title': title,
+                'year': year,
+                'rating': rating,
+                'poster': poster
+            }])
+
+    def add_movies(self, movies):
+        """Record several movies as upserts in the log with a single write."""
+        with self.lock.hold(exclusive=True):
+            cached = self._ensure_loaded()
+            cached.update(movies)
+            self._append_log([{
+                'op': 'upsert',
+                'title': movie_title,
+                'year': movie_data['year'],
+                'rating': movie_data['rating'],
+                'poster': movie_data['poster']
+            } for movie_title, movie_data in movies.items()])
+
+    def delete_movie(self, title):
+        """Record a tombstone for the movie in the log."""
+        with self.lock.hold(exclusive=True):
+            movies = self._ensure_loaded()
+            if title in movies:
+                del movies[title]
+                self._append_log([{'op': 'delete', 'title': title}])
+                print(f"Movie '{title}' deleted successfully.")
+            else:
+                print(f"Movie '{title}' not found.")
+
+    def update_movie(self, title, rating):
+        """Record the movie with its new rating as an upsert in the log."""
+        with self.lock.hold(exclusive=True):
+            movies = self._ensure_loaded()
+            if title in movies:
+                movie = movies[title]
+                movie['rating'] = rating
+                self._append_log([{
+                    'op': 'upsert',
+                    'title': title,
+                    'year': movie['year'],
+                    'rating': rating,
+                    'poster': movie['poster']
+                }])
+                print(f"Movie '{title}' updated successfully.")
+            else:
+                print(f"Movie '{title}' not found.")
+
+    def save_movies(self, movies, expected_version=None):
+        """Write the movies to the base file and discard the log."""
+        with self.lock.hold(exclusive=True):
+            StorageCsv.save_movies(self, movies, expected_version)
+            if os.path.exists(self.log_path):
+                os.remove(self.log_path)
+            self._log_records = 0
+            if movies is not self._movies:
+                self._movies = self._new_movies(movies.items())
+            self._file_signature = self._signature()
+
+    def compact(self):
+        """Fold the log into the base file."""
+        self.save_movies(self._ensure_loaded())
@@ -0,0 +1,155 @@
+# storage_csv_mapped.py
+import csv
+import mmap
+import os
+import pickle
+from storage.locking import write_atomic
+from storage.storage_csv import StorageCsv
+from storage.normalize import parse_rating, parse_year
+
+# Bytes before the indexed end of file that are compared to detect appends
+_TAIL_CHECK = 64
+
+
+class StorageCsvMapped(StorageCsv):
+    """CSV storage with a persisted title -> byte offset index.
+
+    The file is memory-mapped, so looking up one title seeks to its row
+    and parses only that row. The index is stored next to the CSV file in
+    ``<file_path>.idx`` and rebuilt lazily when the file changes. When the
+    file only grew by appended rows, just the new rows are indexed; a
+    rewrite replaces the file, so a new inode means a full rescan.
+    """
+
+    def __init__(self, file_path, compact=False):
+        super().__init__(file_path, compact)
+        self.index_path = file_path + '.idx'
+        self._offsets = None
+        self._indexed_inode = None
+        self._indexed_size = 0
+        self._tail = b''
+        self._file_signature = None
+
+    def _signature(self):
+        """Return an (inode, mtime, size) tuple for the CSV file, or None if missing."""
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _read_record(mapped, offset):
+        """Return (fields, end offset) of the CSV record starting at offset.
+
+        Quoted fields may contain newlines, so lines are joined until the
+        quotes balance.
+        """
+        end = offset
+        while True:
+            newline = mapped.find(b'\n', end)
+            end = len(mapped) if newline == -1 else newline + 1
+            raw = mapped[offset:end]
+            if raw.count(b'"') % 2 == 0 or end == len(mapped):
+                break
+        fields = next(csv.reader([raw.decode('utf-8')]), [])
+        return fields, end
+
+    def _scan(self, mapped, start):
+        """Index every record from start to the end of the mapped file."""
+        offset = start
+        if offset == 0:
+            _, offset = self._read_record(mapped, 0)  # Skip the header row
+        size = len(mapped)
+        while offset < size:
+            fields, end = self._read_record(mapped, offset)
+            if fields:
+                self._offsets[fields[0]] = offset
+            offset = end
+
+    def _load_index(self):
+        """Load the persisted index, or return False if there is none."""
+        try:
+            with open(self.index_path, 'rb') as file:
+                (self._indexed_inode, self._indexed_size, self._tail,
+                 self._offsets) = pickle.load(file)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError, ValueError):
+            return False
+        return True
+
+    def _save_index(self):
+        """Persist the index next to the CSV file.
+
+        Readers only hold the shared lock, so the index is written to a
+        temporary file and renamed into place rather than written in place.
+        """
+        write_atomic(self.index_path, lambda file: pickle.dump(
+            (self._indexed_inode, self._indexed_size, self._tail, self._offsets), file,
+            pickle.HIGHEST_PROTOCOL
+        ), binary=True)
+
+    def _ensure_index(self):
+        """Bring the index up to date with the file and return it."""
+        with self.lock.hold():
+            return self._update_index()
+
+    def _update_index(self):
+        """Index the rows added since the last call, or the whole file if it was rewritten."""
+        signature = self._signature()
+        if self._offsets is not None and signature == self._file_signature:
+            return self._offsets
+        if self._offsets is None:
+            self._load_index()
+
+        inode, _, size = signature if signature else (None, None, 0)
+        if size == 0:
+            self._offsets, self._indexed_size, self._tail = {}, 0, b''
+            self._indexed_inode = inode
+            self._file_signature = signature
+            return self._offsets
+
+        with open(self.file_path, 'rb') as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            indexed = self._indexed_size
+            appended = (
+                self._offsets is not None
+                and inode == self._indexed_inode
+                and 0 < indexed <= size
+                and mapped[max(0, indexed - _TAIL_CHECK):indexed] == self._tail
+            )
+            if not appended:
+                self._offsets = {}
+                indexed = 0
+            if indexed < size:
+                self._scan(mapped, indexed)
+            self._indexed_inode = inode
+            self._indexed_size = size
+            self._tail = mapped[max(0, size - _TAIL_CHECK):size]
+
+        self._file_signature = signature
+        self._save_index()
+        return self._offsets
+
+    def has_movie(self, title):
+        """Return True if a movie with this title is stored."""
+        return title in self._ensure_index()
+
+    def get_movie(self, title):
+        """Return the details of one movie by parsing only its row, or None."""
+        with self.lock.hold():
+            offset = self._ensure_index().get(title)
+            if offset is None:
+                return None
+            with open(self.file_path, 'rb') as file, \
+                    mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                fields, _ = self._read_record(mapped, offset)
+        _, year, rating, poster = fields
+        return {'rating': parse_rating(rating), 'year': parse_year(year), 'poster': poster}
+
+    def add_movie(self, title, year, rating, poster):
+        """Append a movie unless a movie with the same title already exists."""
+        with self.lock.hold(exclusive=True):
+            if self.has_movie(title):
+                print(f"Movie '{title}' already exists.")
+                return
+            super().add_movie(title, year, rating, poster)
@@ -1,9 +1,19 @@
 import json
 import os
+from movie_catalog import MovieCatalog
+from storage.istorage import IStorage
 
-class StorageJson:
-    def __init__(self, file_path):
+class StorageJson(IStorage):
+    def __init__(self, file_path, compact=False):
+        """Initialize the storage.
+
+        Args:
+            file_path (str): Path of the JSON file.
+            compact (bool): Return movies as a memory-efficient MovieCatalog
+                instead of a dictionary of dictionaries.
+        """
         self.file_path = file_path
+        self.compact_movies = compact
         if not os.path.exists(self.file_path):
             # Create an empty file if it doesn't exist
             with open(self.file_path, 'w') as file:
@@ -12,9 +22,24 @@ class StorageJson:
     def get_movies(self):
         """Retrieve movies from the storage (JSON file)."""
         with open(self.file_path, 'r') as file:
-            return json.load(file)
+            movies = json.load(file)
+        return MovieCatalog(movies) if self.compact_movies else movies
+
+    def list_movies(self):
+        """Retrieve movies from the storage; the same as get_movies."""
+        return self.get_movies()
+
+    def version(self):
+        """Return a token that changes whenever the file is rewritten, or None if missing."""
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
 
     def save_movies(self, movies):
         """Save the updated list of movies to the JSON file."""
+        if isinstance(movies, MovieCatalog):
+            movies = movies.to_dict()
         with open(self.file_path, 'w') as file:
             json.dump(movies, file, indent=4)
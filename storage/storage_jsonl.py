@@ -0,0 +1,156 @@
+# storage_jsonl.py
+import json
+import os
+import sys
+from storage.istorage import IStorage
+from storage.locking import write_atomic
+
+
+def _encode(title, details):
+    """Return one JSON Lines record for a movie."""
+    return json.dumps({'title': title, **details}, ensure_ascii=False) + '\n'
+
+
+class StorageJsonl(IStorage):
+    """Movie storage in JSON Lines format, one movie object per line.
+
+    Reads stream one line at a time, adding a movie appends a single line,
+    and rewrites (update, delete, save) go to a temporary file that is
+    renamed over the original, so readers never see a half-written file.
+    The set of titles is cached to check for duplicates without parsing
+    the file, and reloaded when the file changes on disk.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._titles = None
+        self._file_signature = None
+
+    def _signature(self):
+        """Return a (mtime, size) tuple for the file, or None if missing."""
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def version(self):
+        """Return a token that changes whenever the file is rewritten or appended to."""
+        return self._signature()
+
+    def _known_titles(self):
+        """Return the cached set of titles, reloading it if the file changed."""
+        signature = self._signature()
+        if self._titles is None or signature != self._file_signature:
+            self._titles = {title for title, _ in self.iter_movies()}
+            self._file_signature = signature
+        return self._titles
+
+    def iter_movies(self):
+        """Yield (title, details) pairs one line at a time."""
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    title = record.pop('title')
+                    yield title, record
+        except FileNotFoundError:
+            return
+
+    def list_movies(self):
+        """Read all movies into a dictionary of dictionaries."""
+        return dict(self.iter_movies())
+
+    def add_movie(self, title, year, rating, poster):
+        """Append a movie, or replace it if the title already exists."""
+        self.add_movies({title: {'rating': rating, 'year': year, 'poster': poster}})
+
+    def add_movies(self, movies):
+        """Append several movies; existing titles are replaced in one rewrite.
+
+        Args:
+            movies (dict): The dictionary of movies to add.
+        """
+        titles = self._known_titles()
+        if any(title in titles for title in movies):
+            self._rewrite(lambda title, details: movies.get(title, details), append=movies)
+            return
+        with open(self.file_path, 'a', encoding='utf-8') as file:
+            file.writelines(_encode(title, details) for title, details in movies.items())
+        titles.update(movies)
+        self._file_signature = self._signature()
+
+    def _rewrite(self, change, append=None):
+        """Stream the file through change() into a new file and swap it in.
+
+        Args:
+            change: Called with (title, details); returns the new details or
+                None to drop the movie.
+            append (dict): Movies to add at the end if they were not in the file.
+        """
+        written = set()
+
+        def lines():
+            for title, details in self.iter_movies():
+                details = change(title, details)
+                if details is not None:
+                    written.add(title)
+                    yield _encode(title, details)
+            for title, details in (append or {}).items():
+                if title not in written:
+                    written.add(title)
+                    yield _encode(title, details)
+
+        write_atomic(self.file_path, lambda file: file.writelines(lines()))
+        self._titles = written
+        self._file_signature = self._signature()
+
+    def delete_movie(self, title):
+        """Delete a movie by rewriting the file without it."""
+        if title not in self._known_titles():
+            print(f"Movie '{title}' not found.")
+            return
+        self._rewrite(lambda movie_title, details: None if movie_title == title else details)
+        print(f"Movie '{title}' deleted successfully.")
+
+    def update_movie(self, title, rating):
+        """Update a movie's rating by rewriting the file."""
+        if title not in self._known_titles():
+            print(f"Movie '{title}' not found.")
+            return
+        self._rewrite(
+            lambda movie_title, details:
+                dict(details, rating=rating) if movie_title == title else details
+        )
+        print(f"Movie '{title}' updated successfully.")
+
+    def save_movies(self, movies):
+        """Replace the file with the given movies, atomically.
+
+        Args:
+            movies (dict): The dictionary of movies to save.
+        """
+        write_atomic(self.file_path, lambda file: file.writelines(
+            _encode(title, dict(details)) for title, details in movies.items()))
+        self._titles = set(movies)
+        self._file_signature = self._signature()
+
+
+def convert_json_to_jsonl(json_path, jsonl_path):
+    """Convert a data.json style file into JSON Lines.
+
+    Returns:
+        int: The number of movies converted.
+    """
+    with open(json_path, 'r', encoding='utf-8') as file:
+        movies = json.load(file)
+    StorageJsonl(jsonl_path).save_movies(movies)
+    return len(movies)
+
+
+if __name__ == "__main__":
+    # python -m storage.storage_jsonl data/data.json data/data.jsonl
+    count = convert_json_to_jsonl(sys.argv[1], sys.argv[2])
+    print(f"Converted {count} movies to '{sys.argv[2]}'.")
@@ -0,0 +1,248 @@
+# storage_sqlite.py
+import sqlite3
+from storage.istorage import IStorage
+from storage.normalize import year_range, parse_year
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS movies (
+    title TEXT PRIMARY KEY,
+    year TEXT,
+    year_start INTEGER,
+    year_end INTEGER,
+    rating REAL,
+    poster TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_movies_title_nocase ON movies (title COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_movies_year ON movies (year_start);
+CREATE INDEX IF NOT EXISTS idx_movies_rating ON movies (rating);
+"""
+
+
+class StorageSqlite(IStorage):
+    """Movie storage backed by an indexed SQLite database.
+
+    Searching, sorting and rating statistics run as SQL queries, so they do
+    not need the whole catalog in memory.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        # The connection may be used from a web server's worker threads
+        self._connection = sqlite3.connect(file_path, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+
+    @staticmethod
+    def _row_to_movie(row):
+        """Convert a (title, year, rating, poster) row into a (title, details) pair."""
+        title, year, rating, poster = row
+        return title, {'rating': rating, 'year': parse_year(year), 'poster': poster}
+
+    @staticmethod
+    def _movie_to_row(title, year, rating, poster):
+        """Convert movie fields into a row for the movies table."""
+        start, end = year_range(year)
+        return title, None if year is None else str(year), start, end, rating, poster
+
+    def _query(self, sql, params=()):
+        """Run a SELECT of (title, year, rating, poster) and yield (title, details) pairs."""
+        for row in self._connection.execute(sql, params):
+            yield self._row_to_movie(row)
+
+    def list_movies(self):
+        """Return all movies as a dictionary of dictionaries."""
+        return dict(self._query("SELECT title, year, rating, poster FROM movies"))
+
+    def iter_movies(self):
+        """Yield movies one row at a time as (title, details) pairs."""
+        yield from self._query("SELECT title, year, rating, poster FROM movies")
+
+    def version(self):
+        """Return a token that changes on every commit, from this or another connection."""
+        data_version = self._connection.execute("PRAGMA data_version").fetchone()[0]
+        return data_version, self._connection.total_changes
+
+    def add_movie(self, title, year, rating, poster):
+        """Add a movie, replacing any existing movie with the same title."""
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO movies VALUES (?, ?, ?, ?, ?, ?)",
+                self._movie_to_row(title, year, rating, poster)
+            )
+
+    def add_movies(self, movies):
+        """Add several movies in a single transaction.
+
+        Args:
+            movies (dict): The dictionary of movies to add.
+        """
+        rows = (
+            self._movie_to_row(title, data['year'], data['rating'], data.get('poster'))
+            for title, data in movies.items()
+        )
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO movies VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def delete_movie(self, title):
+        """Delete a movie by title."""
+        with self._connection:
+            cursor = self._connection.execute("DELETE FROM movies WHERE title = ?", (title,))
+        if cursor.rowcount:
+            print(f"Movie '{title}' deleted successfully.")
+        else:
+            print(f"Movie '{title}' not found.")
+
+    def update_movie(self, title, rating):
+        """Update a movie's rating."""
+        with self._connection:
+            cursor = self._connection.execute(
+                "UPDATE movies SET rating = ? WHERE title = ?", (rating, title)
+            )
+        if cursor.rowcount:
+            print(f"Movie '{title}' updated successfully.")
+        else:
+            print(f"Movie '{title}' not found.")
+
+    def save_movies(self, movies):
+        """Replace the whole catalog with the given movies.
+
+        Args:
+            movies (dict): The dictionary of movies to save.
+        """
+        rows = (
+            self._movie_to_row(title, data['year'], data['rating'], data.get('poster'))
+            for title, data in movies.items()
+        )
+        with self._connection:
+            self._connection.execute("DELETE FROM movies")
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO movies VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+        print("Movies saved to the SQLite database.")
+
+    def search_movie(self, query):
+        """Return (title, details) pairs whose title contains the query, ignoring case."""
+        pattern = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return list(self._query(
+            "SELECT title, year, rating, poster FROM movies "
+            "WHERE title LIKE ? ESCAPE '\\' ORDER BY title COLLATE NOCASE",
+            (f"%{pattern}%",)
+        ))
+
+    def get_movie(self, title):
+        """Return the details of one movie by its primary key, or None."""
+        movies = list(self._query(
+            "SELECT title, year, rating, poster FROM movies WHERE title = ?", (title,)
+        ))
+        return movies[0][1] if movies else None
+
+    def range_query(self, min_rating=None, max_rating=None, start_year=None, end_year=None,
+                    limit=None):
+        """Return titles within a rating range whose years overlap a year range.
+
+        Answers the same query as SortIndex.range_query, with the same
+        result: titles of rated movies, highest rated first. The rating and
+        year indexes of the table do the work.
+        """
+        conditions = ["rating IS NOT NULL"]
+        params = []
+        if min_rating is not None:
+            conditions.append("rating >= ?")
+            params.append(min_rating)
+        if max_rating is not None:
+            conditions.append("rating <= ?")
+            params.append(max_rating)
+        if start_year is not None or end_year is not None:
+            conditions.append("year_start IS NOT NULL")
+        if start_year is not None:
+            conditions.append("year_end >= ?")
+            params.append(start_year)
+        if end_year is not None:
+            conditions.append("year_start <= ?")
+            params.append(end_year)
+        sql = (f"SELECT title FROM movies WHERE {' AND '.join(conditions)} "
+               "ORDER BY rating DESC, title DESC")
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [row[0] for row in self._connection.execute(sql, params)]
+
+    def rating_statistics(self):
+        """Return rating statistics computed in SQL.
+
+        Returns:
+            SqliteRatingStatistics: Provides summary(), histogram() and
+            by_year() like RatingStatistics.
+        """
+        return SqliteRatingStatistics(self._connection)
+
+    def close(self):
+        """Close the database connection."""
+        self._connection.close()
+
+
+class SqliteRatingStatistics:
+    """The queries of RatingStatistics answered by a movies table.
+
+    Each method runs its SQL when called, so the answers are always
+    current and nothing is kept in memory.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def summary(self):
+        """Return the headline statistics, or None if there are no rated movies.
+
+        Returns:
+            dict: count, average, median, best and worst as (title, rating).
+        """
+        connection = self._connection
+        count, average = connection.execute(
+            "SELECT COUNT(rating), AVG(rating) FROM movies WHERE rating IS NOT NULL"
+        ).fetchone()
+        if not count:
+            return None
+
+        offset, limit = (count // 2, 1) if count % 2 else (count // 2 - 1, 2)
+        middle = [row[0] for row in connection.execute(
+            "SELECT rating FROM movies WHERE rating IS NOT NULL "
+            "ORDER BY rating LIMIT ? OFFSET ?", (limit, offset)
+        )]
+        best = connection.execute(
+            "SELECT title, rating FROM movies WHERE rating IS NOT NULL "
+            "ORDER BY rating DESC, title DESC LIMIT 1"
+        ).fetchone()
+        worst = connection.execute(
+            "SELECT title, rating FROM movies WHERE rating IS NOT NULL "
+            "ORDER BY rating ASC, title ASC LIMIT 1"
+        ).fetchone()
+        return {
+            'count': count,
+            'average': average,
+            'median': sum(middle) / len(middle),
+            'best': best,
+            'worst': worst
+        }
+
+    def histogram(self):
+        """Return {bucket: count} for whole-number rating buckets, in order.
+
+        Bucket ``n`` holds ratings from n up to n + 1; a 10 counts towards 9.
+        """
+        return dict(self._connection.execute(
+            "SELECT MIN(CAST(rating AS INTEGER), 9) AS bucket, COUNT(*) FROM movies "
+            "WHERE rating IS NOT NULL GROUP BY bucket ORDER BY bucket"
+        ))
+
+    def by_year(self):
+        """Return {year: (count, average rating)} using each movie's start year."""
+        return {
+            year: (count, average)
+            for year, count, average in self._connection.execute(
+                "SELECT year_start, COUNT(rating), AVG(rating) FROM movies "
+                "WHERE rating IS NOT NULL AND year_start IS NOT NULL "
+                "GROUP BY year_start ORDER BY year_start"
+            )
+        }
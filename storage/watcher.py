@@ -0,0 +1,99 @@
+# watcher.py
+import contextlib
+import threading
+import time
+
+
+class StorageWatcher:
+    """Report changes that other processes make to a storage.
+
+    Polls the storage's version() and calls its notify_change('external')
+    once a burst of edits has settled: a new version must stay the same
+    for ``debounce`` seconds before it is reported, so many quick edits
+    give a single notification. Changes made through the storage itself
+    are reported by the storage and are not reported again, as long as the
+    storage was at the last version seen before the change; otherwise
+    another process wrote first and the next poll reports it.
+
+    Polling is used rather than inotify because version() works the same
+    for files, SQLite databases and wrappers, on every platform, and a
+    stat() per interval costs next to nothing.
+    """
+
+    def __init__(self, storage, interval=0.5, debounce=1.0, lock=None):
+        """Initialize the watcher.
+
+        Args:
+            storage: The storage to watch; its version() must not be None.
+            interval (float): Seconds between polls.
+            debounce (float): Seconds a new version must stay the same before
+                it is reported.
+            lock: Held by the background thread while it polls, so that
+                rebuilding after a change does not run while another thread
+                uses the storage.
+        """
+        self.storage = storage
+        self.interval = interval
+        self.debounce = debounce
+        self.lock = lock if lock is not None else contextlib.nullcontext()
+        self._version = storage.version()
+        self._pending = None
+        self._pending_since = None
+        self._stop = threading.Event()
+        self._thread = None
+        storage.subscribe(self._on_change)
+
+    def _on_change(self, change):
+        """Accept the version left by a change made in this process.
+
+        Only if the storage was at the last seen version right before the
+        change; otherwise an external write is pending and must not be
+        absorbed.
+        """
+        if change.kind == 'external':
+            return
+        if change.previous_version is not None and change.previous_version == self._version:
+            self._version = self.storage.version()
+            self._pending = None
+
+    def poll(self):
+        """Check the storage once.
+
+        Returns:
+            bool: True if a settled change was reported.
+        """
+        version = self.storage.version()
+        if version == self._version:
+            self._pending = None
+            return False
+        now = time.monotonic()
+        if version != self._pending:
+            # Still changing; wait for it to settle
+            self._pending = version
+            self._pending_since = now
+            return False
+        if now - self._pending_since < self.debounce:
+            return False
+        self._version = version
+        self._pending = None
+        self.storage.notify_change('external')
+        return True
+
+    def run(self):
+        """Poll until stop() is called."""
+        while not self._stop.wait(self.interval):
+            with self.lock:
+                self.poll()
+
+    def start(self):
+        """Poll in a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='storage-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread started by start()."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -1,67 +1,453 @@
-def generate_website(movies):
+import contextlib
+import filecmp
+import hashlib
+import html
+import json
+import mmap
+import os
+import shutil
+import sqlite3
+from collections.abc import Mapping
+from itertools import islice
+from movies import sort_movie_by_year, sort_movie_by_rating
+from storage.locking import write_atomic
+
+# Template with __TEMPLATE_TITLE__, __TEMPLATE_MOVIE_GRID__ and
+# __TEMPLATE_PAGINATION__ placeholders
+TEMPLATE_FILE = 'static/template.html'
+STYLE_FILE = 'static/style.css'
+
+# Cached movie cards of WebsiteBuilder, keyed by title, and the state of the
+# last page it wrote
+FRAGMENT_SCHEMA = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+CREATE TABLE IF NOT EXISTS fragments (
+    title TEXT PRIMARY KEY,
+    row TEXT NOT NULL,
+    fragment TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS page (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Movies whose cached cards are read or written with one query
+FRAGMENT_BATCH = 500
+
+
+def _sort_movie_by_title(movies):
+    """Sort movies alphabetically by title, ignoring case."""
+    return sorted(movies.items(), key=lambda x: x[0].casefold())
+
+
+# Sort orders for paginated output, mapped to their sort helpers
+SORT_ORDERS = {
+    'title': _sort_movie_by_title,
+    'year': sort_movie_by_year,
+    'rating': sort_movie_by_rating
+}
+
+
+def render_movie(title, details):
     """
-    Generate an HTML website listing all the movies in the collection.
+    Render a single movie as an HTML card for the movie grid.
 
     Args:
-        movies (dict): The dictionary of movies to display on the website.
+        title (str): The movie title.
+        details (dict): The movie details with rating, year and optional poster.
     """
-    # Start HTML structure with basic styling
-    html_content = """
-    <html>
-    <head>
-        <title>Movie List</title>
-        <style>
-            body {
-                font-family: Arial, sans-serif;
-                margin: 0;
-                padding: 20px;
-                background-color: #f4f4f4;
-            }
-            h1 {
-                text-align: center;
-                color: #333;
-            }
-            ul {
-                list-style-type: none;
-                padding: 0;
-            }
-            li {
-                padding: 10px;
-                background-color: #fff;
-                margin: 5px 0;
-                border: 1px solid #ddd;
-                border-radius: 5px;
-            }
-            li:hover {
-                background-color: #f1f1f1;
-                cursor: pointer;
-            }
-            @media (max-width: 600px) {
-                body { padding: 10px; }
-                h1 { font-size: 1.5em; }
+    poster = details.get('poster')
+    rating = details.get('rating')
+    parts = ['<div class="movie">']
+    if poster and poster != 'N/A':
+        parts.append(f'<img src="{html.escape(poster)}" alt="{html.escape(title)} poster" '
+                     f'class="movie-poster">')
+    parts.append(f'<h3>{html.escape(title)}</h3>')
+    parts.append(f'<p>{html.escape(str(details.get("year")))}</p>')
+    parts.append(f'<p>Rating: {rating if rating is not None else "N/A"}</p>')
+    parts.append('</div>\n')
+    return ''.join(parts)
+
+
+def _read_template(template_file, title, pagination=''):
+    """Return the template split into the parts before and after the movie grid."""
+    with open(template_file, 'r', encoding='utf-8') as file:
+        template = file.read()
+    template = template.replace('__TEMPLATE_TITLE__', html.escape(title))
+    template = template.replace('__TEMPLATE_PAGINATION__', pagination)
+    head, tail = template.split('__TEMPLATE_MOVIE_GRID__', 1)
+    return head, tail
+
+
+def _copy_stylesheet(output_file):
+    """Copy the stylesheet next to the output file if it is missing or out of date."""
+    style_file = os.path.join(os.path.dirname(output_file), 'style.css')
+    if not os.path.exists(style_file) or not filecmp.cmp(STYLE_FILE, style_file, shallow=False):
+        shutil.copyfile(STYLE_FILE, style_file)
+
+
+def iter_website(movies, title, template_file=TEMPLATE_FILE):
+    """
+    Yield the website as a stream of HTML chunks.
+
+    The template is split at the movie grid placeholder, so only one movie
+    card is held in memory at a time.
+
+    Args:
+        movies: A dictionary of movies or an iterable of (title, details) pairs.
+        title (str): The page title.
+        template_file (str): Path of the HTML template.
+    """
+    head, tail = _read_template(template_file, title)
+    if isinstance(movies, Mapping):
+        movies = movies.items()
+
+    yield head
+    for movie_title, details in movies:
+        yield render_movie(movie_title, details)
+    yield tail
+
+
+def write_website(movies, output_file, title, template_file=TEMPLATE_FILE):
+    """
+    Stream the website for the given movies straight into a file.
+
+    The file is replaced atomically, so a reader never sees a half-written
+    page. The stylesheet is copied next to the output file if it is not
+    there yet or out of date.
+
+    Args:
+        movies: A dictionary of movies or an iterable of (title, details) pairs.
+        output_file (str): Path of the HTML file to write.
+        title (str): The page title.
+        template_file (str): Path of the HTML template.
+    """
+    write_atomic(output_file, lambda file: file.writelines(iter_website(movies, title, template_file)))
+    _copy_stylesheet(output_file)
+
+
+class WebsiteBuilder:
+    """
+    Regenerate a website incrementally.
+
+    Each movie card is cached in SQLite together with the row it was
+    rendered from, so only new or changed movies are rendered again and
+    only their cards are written to the cache. Just the rows are kept in
+    memory, along with where each card sits in the page last written.
+    While that page is untouched, unchanged cards are copied from it in
+    contiguous runs; otherwise they are read back from the cache in
+    batches. Either way the whole page is never held in memory. The output file is only rewritten when the generated
+    page differs from the last one. Without a ``cache_file`` the cache is
+    kept in memory for the lifetime of the builder.
+    """
+
+    def __init__(self, output_file, title, template_file=TEMPLATE_FILE, cache_file=None):
+        self.output_file = output_file
+        self.title = title
+        self.template_file = template_file
+        self.cache_file = cache_file
+        self.rendered = 0
+        self._connection = sqlite3.connect(cache_file or ':memory:')
+        self._connection.executescript(FRAGMENT_SCHEMA)
+        self._rows = None
+        self._spans = {}
+        self._page_signature = None
+
+    def _cached_rows(self):
+        """Return {title: row} of the cached cards, reading them on first use."""
+        if self._rows is None:
+            self._rows = {
+                title: tuple(json.loads(row))
+                for title, row in self._connection.execute("SELECT title, row FROM fragments")
             }
-        </style>
-    </head>
-    <body>
-        <h1>Movie Collection</h1>
-        <ul>
+        return self._rows
+
+    def _page_state(self):
+        """Return what the last written page was built from, or None."""
+        row = self._connection.execute("SELECT value FROM page WHERE key = 'state'").fetchone()
+        return row[0] if row else None
+
+    def _forget_removed(self, titles):
+        """Delete the cards of movies that are no longer listed."""
+        stored = self._connection.execute("SELECT COUNT(*) FROM fragments").fetchone()[0]
+        listed = set(titles)
+        if stored <= len(listed):
+            return
+        removed = [title for title in self._rows if title not in listed]
+        self._connection.executemany("DELETE FROM fragments WHERE title = ?",
+                                     [(title,) for title in removed])
+        for title in removed:
+            del self._rows[title]
+
+    def _signature(self):
+        """Return an (inode, mtime, size) tuple for the output file, or None if missing."""
+        try:
+            stat = os.stat(self.output_file)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _fetch(self, titles):
+        """Return {title: card} for a batch of titles from the cache."""
+        placeholders = ', '.join('?' * len(titles))
+        return dict(self._connection.execute(
+            f"SELECT title, fragment FROM fragments WHERE title IN ({placeholders})", titles
+        ))
+
+    def _write_page(self, file, template, titles, rendered, previous, spans):
+        """Stream the page into a binary file and record where each card ends up.
+
+        Args:
+            file: The file to write to.
+            template: The (head, tail) parts of the template.
+            titles (list): Titles in page order.
+            rendered (dict): Cards rendered by this build, by title.
+            previous: The page last written, memory-mapped, or None.
+            spans (dict): Filled with the (start, end) byte range of each card.
+        """
+        old_spans = self._spans if previous is not None else {}
+        head, tail = (part.encode('utf-8') for part in template)
+        file.write(head)
+        position = len(head)
+        run = None  # [start, end] of cards waiting to be copied from the previous page
+
+        for start in range(0, len(titles), FRAGMENT_BATCH):
+            batch = titles[start:start + FRAGMENT_BATCH]
+            missing = [title for title in batch if title not in rendered and title not in old_spans]
+            cached = self._fetch(missing) if missing else {}
+            for movie_title in batch:
+                span = None if movie_title in rendered else old_spans.get(movie_title)
+                if span is not None:
+                    if run is not None and run[1] == span[0]:
+                        run[1] = span[1]
+                    else:
+                        if run is not None:
+                            file.write(previous[run[0]:run[1]])
+                        run = list(span)
+                    length = span[1] - span[0]
+                else:
+                    if run is not None:
+                        file.write(previous[run[0]:run[1]])
+                        run = None
+                    fragment = rendered.get(movie_title) or cached[movie_title]
+                    length = file.write(fragment.encode('utf-8'))
+                spans[movie_title] = (position, position + length)
+                position += length
+
+        if run is not None:
+            file.write(previous[run[0]:run[1]])
+        file.write(tail)
+
+    def build(self, movies):
+        """
+        Bring the output file up to date with the given movies.
+
+        Args:
+            movies: A dictionary of movies or an iterable of (title, details) pairs.
+
+        Returns:
+            bool: True if the output file was rewritten.
+        """
+        template = _read_template(self.template_file, self.title)
+        if isinstance(movies, Mapping):
+            movies = movies.items()
+        movies = iter(movies)
+
+        rows = self._cached_rows()
+        rendered = {}
+        titles = []
+        self.rendered = 0
+        try:
+            with self._connection:
+                while batch := list(islice(movies, FRAGMENT_BATCH)):
+                    changed = []
+                    for movie_title, details in batch:
+                        titles.append(movie_title)
+                        row = (details.get('rating'), details.get('year'), details.get('poster'))
+                        if rows.get(movie_title) != row:
+                            rows[movie_title] = row
+                            rendered[movie_title] = render_movie(movie_title, details)
+                            changed.append((movie_title, json.dumps(row), rendered[movie_title]))
+                    self._connection.executemany(
+                        "INSERT OR REPLACE INTO fragments VALUES (?, ?, ?)", changed
+                    )
+        except BaseException:
+            self._rows = None  # The cards of this batch were not stored
+            raise
+
+        self.rendered = len(rendered)
+
+        # Same template, no re-rendered cards and the same titles in the same
+        # order means the page would come out byte for byte identical.
+        order = hashlib.sha1('\0'.join(titles).encode('utf-8')).hexdigest()
+        state = json.dumps([template, order])
+        if not self.rendered and state == self._page_state() and os.path.exists(self.output_file):
+            return False
+
+        # The previous page can only be copied from if nothing else rewrote it
+        signature = self._signature()
+        spans = {}
+        with contextlib.ExitStack() as stack:
+            previous = None
+            if signature is not None and signature == self._page_signature and signature[2]:
+                file = stack.enter_context(open(self.output_file, 'rb'))
+                previous = memoryview(stack.enter_context(
+                    mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                ))
+                stack.callback(previous.release)
+            write_atomic(self.output_file, lambda file: self._write_page(
+                file, template, titles, rendered, previous, spans
+            ), binary=True)
+        self._spans = spans
+        self._page_signature = self._signature()
+        _copy_stylesheet(self.output_file)
+        with self._connection:
+            self._forget_removed(titles)
+            self._connection.execute("INSERT OR REPLACE INTO page VALUES ('state', ?)", (state,))
+        return True
+
+    def close(self):
+        """Close the cache database."""
+        self._connection.close()
+
+
+def _page_file(order, number):
+    """Return the file name of a page in the given sort order."""
+    return f"{order}-page-{number}.html"
+
+
+def _render_pagination(order, number, page_count):
+    """Render the navigation links for one page."""
+    links = []
+    if number > 1:
+        links.append(f'<a href="{_page_file(order, number - 1)}">Previous</a>')
+    links.append(f'<span>Page {number} of {page_count}</span>')
+    if number < page_count:
+        links.append(f'<a href="{_page_file(order, number + 1)}">Next</a>')
+    links.append('<span>Sort by:</span>')
+    links.extend(f'<a href="{_page_file(name, 1)}">{name.capitalize()}</a>' for name in SORT_ORDERS)
+    return f'<nav class="pagination">{" ".join(links)}</nav>'
+
+
+def _write_page(job):
+    """Render and write one page; runs inside a worker process."""
+    output_file, title, template_file, pagination, movies = job
+    head, tail = _read_template(template_file, title, pagination)
+    with open(output_file, 'w', encoding='utf-8') as file:
+        file.write(head)
+        file.writelines(render_movie(movie_title, details) for movie_title, details in movies)
+        file.write(tail)
+    return output_file
+
+
+def write_paginated_website(movies, output_dir, title, per_page=100,
+                            template_file=TEMPLATE_FILE, processes=None):
     """
+    Write the movies as paginated pages in every sort order.
+
+    Pages are named ``<order>-page-<n>.html`` and rendered in parallel
+    across a process pool. An ``index.json`` file lists the pages of each
+    sort order for client-side navigation, with a hash of each page's
+    content. Pages whose hash matches the previous index.json are not
+    written again, and pages that no longer exist are removed, so after a
+    small edit only the affected pages are rewritten.
 
-    # Adding each movie as a list item in HTML
-    for title, details in movies.items():
-        html_content += f"<li><strong>{title}</strong> - Rating: {details['rating']} (Year: {details['year']})</li>"
+    Args:
+        movies (dict): The dictionary of movies to display.
+        output_dir (str): Directory to write the pages to.
+        title (str): The site title.
+        per_page (int): Number of movies per page.
+        template_file (str): Path of the HTML template.
+        processes (int): Number of worker processes; 1 renders in this process.
 
-    # Close the list and HTML tags
-    html_content += """
-        </ul>
-    </body>
-    </html>
+    Returns:
+        dict: The index that was written to ``index.json``, plus the number
+        of pages rewritten under 'written'.
     """
+    os.makedirs(output_dir, exist_ok=True)
+    index_file = os.path.join(output_dir, 'index.json')
+    previous = _previous_hashes(index_file)
+    with open(template_file, 'r', encoding='utf-8') as file:
+        template = file.read()
+    jobs = []
+    index = {'title': title, 'per_page': per_page, 'total': len(movies), 'orders': {}}
+
+    for order, sort in SORT_ORDERS.items():
+        ordered = sort(movies)
+        page_count = max(1, -(-len(ordered) // per_page))
+        pages = []
+        for number in range(1, page_count + 1):
+            page_movies = ordered[(number - 1) * per_page:number * per_page]
+            file_name = _page_file(order, number)
+            output_file = os.path.join(output_dir, file_name)
+            job = (
+                output_file,
+                f"{title} - Page {number} of {page_count}",
+                template_file,
+                _render_pagination(order, number, page_count),
+                page_movies
+            )
+            content = (template, job[1], job[3], [(movie_title, dict(details))
+                                                    for movie_title, details in page_movies])
+            page_hash = hashlib.sha1(repr(content).encode('utf-8')).hexdigest()
+            if previous.pop(file_name, None) != page_hash or not os.path.exists(output_file):
+                jobs.append(job)
+            pages.append({
+                'file': file_name,
+                'count': len(page_movies),
+                'first': page_movies[0][0] if page_movies else None,
+                'last': page_movies[-1][0] if page_movies else None,
+                'hash': page_hash
+            })
+        index['orders'][order] = pages
+
+    # Pages left over from a larger catalog
+    for file_name in previous:
+        stale = os.path.join(output_dir, file_name)
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    if processes == 1 or len(jobs) <= 1:
+        for job in jobs:
+            _write_page(job)
+    else:
+        from concurrent.futures import ProcessPoolExecutor  # Pulls in multiprocessing
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            for _ in executor.map(_write_page, jobs, chunksize=max(1, len(jobs) // 32)):
+                pass
+
+    with open(index_file, 'w', encoding='utf-8') as file:
+        json.dump(index, file)
+    _copy_stylesheet(index_file)
+    return dict(index, written=len(jobs))
+
 
+def _previous_hashes(index_file):
+    """Return {page file: hash} from an existing index.json, or {} if there is none."""
+    try:
+        with open(index_file, 'r', encoding='utf-8') as file:
+            index = json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return {
+        page['file']: page.get('hash')
+        for pages in index.get('orders', {}).values()
+        for page in pages
+    }
+
+
+def generate_website(movies):
+    """
+    Generate an HTML website listing all the movies in the collection.
+
+    Args:
+        movies (dict): The dictionary of movies to display on the website.
+    """
     # Try writing to file with error handling
     try:
-        with open('movies.html', 'w') as file:
-            file.write(html_content)
+        write_website(movies, 'movies.html', 'Movie Collection')
         print("Website has been generated as 'movies.html'.")
     except Exception as e:
         print(f"Error writing file: {e}")